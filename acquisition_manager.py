@@ -0,0 +1,139 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+import itertools
+import logging
+import threading
+import time
+from optris_cslaser_control import OptrisCSLaserControl, BAUDRATE, TIMEOUT, SNAPSHOT_FIELDS
+from data_collector import format_timestamp
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+FRAME_HISTORY = 4096 # frames kept for frames_since(), ~ 34 min at 2 Hz
+
+
+@dataclass
+class AcquisitionFrame:
+    """
+    One tick of AcquisitionManager: snapshots of all devices requested at the same time
+    time_ns is the unix ns of the request; each snapshot carries the arrival time
+    (time_ns) and latency of its own answer.
+    """
+    time_ns: int
+    samples: dict = field(default_factory=dict) # label -> CSLaserSnapshot or None
+    fields: tuple = SNAPSHOT_FIELDS
+
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.time_ns / 1e9)
+
+
+    def to_dict(self) -> dict:
+        # fixed columns even if a device did not answer, so CSV rows stay aligned
+        data_dict = {"timestamp": format_timestamp(self.time_ns), "timestamp_ns": self.time_ns}
+        for label, snapshot in self.samples.items():
+            for key in self.fields + ("time_ns", "latency"):
+                data_dict[f"{label}_{key}"] = getattr(snapshot, key) if snapshot is not None else None
+        return data_dict
+
+
+class AcquisitionManager:
+    """
+    Owns one OptrisCSLaserControl per port and polls them concurrently,
+    one worker thread per device, so a tick costs the slowest device instead of the sum.
+    """
+    def __init__(self, ports, labels=None, fields=SNAPSHOT_FIELDS, baudrate: int = BAUDRATE, timeout: float = TIMEOUT):
+        labels = list(labels) if labels is not None else list(ports)
+        if len(labels) != len(ports):
+            raise ValueError("labels and ports must have the same length")
+        self.fields = tuple(fields)
+        self.controllers = {
+            label: OptrisCSLaserControl(port=port, baudrate=baudrate, timeout=timeout)
+            for label, port in zip(labels, ports)
+        }
+        self._executor = None
+        self._frames = deque(maxlen=FRAME_HISTORY)
+        self._frame_count = 0 # absolute index of the next frame
+        self._frames_lock = threading.Lock()
+        self._metadata = {}
+
+
+    @property
+    def labels(self) -> list:
+        return list(self.controllers.keys())
+
+
+    @property
+    def latest_frame(self) -> Optional[AcquisitionFrame]:
+        with self._frames_lock:
+            return self._frames[-1] if self._frames else None
+
+
+    @property
+    def frame_count(self) -> int:
+        return self._frame_count
+
+
+    def frames_since(self, index: int):
+        """
+        Frames polled since absolute index -> (frames, next index)
+        Frames older than FRAME_HISTORY are silently skipped (reader fell behind).
+        """
+        with self._frames_lock:
+            stop = self._frame_count
+            start = max(index, stop - len(self._frames))
+            return list(itertools.islice(self._frames, len(self._frames) - (stop - start), None)), stop
+
+
+    def connect(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=len(self.controllers), thread_name_prefix="acquisition")
+        # DTR reset takes 1 sec per device -> do them in parallel
+        list(self._executor.map(lambda controller: controller.connect(), self.controllers.values()))
+        # read once here, the ports belong to the polling afterwards
+        info = self._executor.map(
+            lambda controller: {"port": controller.port, "serial_number": controller.serial_number,
+                                "emissivity": controller.emissivity},
+            self.controllers.values())
+        self._metadata = dict(zip(self.controllers.keys(), info))
+
+
+    def metadata(self) -> dict:
+        """
+        {label: {port, serial_number, emissivity}} as read on connect
+        """
+        return {label: dict(info) for label, info in self._metadata.items()}
+
+
+    def disconnect(self) -> None:
+        for controller in self.controllers.values():
+            controller.disconnect()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+    def poll(self) -> AcquisitionFrame:
+        if self._executor is None:
+            raise RuntimeError("AcquisitionManager is not connected")
+        time_ns = time.time_ns()
+        futures = {
+            label: self._executor.submit(controller.read_snapshot, self.fields)
+            for label, controller in self.controllers.items()
+        }
+        samples = {}
+        for label, future in futures.items():
+            try:
+                samples[label] = future.result()
+            except Exception as e:
+                logging.error(f"Failed to poll {label}: {e}")
+                samples[label] = None
+        frame = AcquisitionFrame(time_ns=time_ns, samples=samples, fields=self.fields)
+        with self._frames_lock:
+            self._frames.append(frame)
+            self._frame_count += 1
+        return frame
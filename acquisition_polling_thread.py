@@ -0,0 +1,33 @@
+from PyQt6.QtCore import pyqtSignal
+from base_polling_thread import BasePollingThread
+from acquisition_manager import AcquisitionFrame
+from interlock import Interlock
+
+
+class AcquisitionPollingThread(BasePollingThread):
+    """
+    Polling thread for AcquisitionManager (passed as controller)
+    interlock_rules are checked on every frame with one Interlock per head, acting on
+    that head's controller on this thread; tripped is emitted afterwards for display only.
+    """
+    updated = pyqtSignal(object)
+    tripped = pyqtSignal(str, object) # label, TripEvent
+
+    def __init__(self, controller, interval: float, interlock_rules=(), parent=None):
+        super().__init__(controller, interval, parent)
+        unpolled = [rule.field for rule in interlock_rules if rule.field not in controller.fields]
+        if unpolled:
+            raise ValueError(f"Interlock fields not polled: {unpolled}")
+        self.interlocks = {label: Interlock(interlock_rules) for label in controller.controllers} if interlock_rules else {}
+
+
+    def get_data(self) -> AcquisitionFrame:
+        frame = self.controller.poll()
+        for label, interlock in self.interlocks.items():
+            for event in interlock.check(frame.samples.get(label), self.controller.controllers[label]):
+                self.tripped.emit(label, event)
+        return frame
+
+
+    def emit_data(self, data: AcquisitionFrame) -> None:
+        self.updated.emit(data)
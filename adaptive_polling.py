@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class AdaptivePollingPolicy:
+    min_interval: float = 0.1 # sec, used while the temperature changes fast
+    max_interval: float = 5.0 # sec, longest interval in steady state
+    rate_threshold: float = 0.5 # °C/sec, faster changes switch to min_interval
+    backoff: float = 1.5 # interval multiplier per steady sample
+    deadband: float = 0.2 # °C, samples closer than this to the last reported value are not reported
+    heartbeat: float = 60.0 # sec, report at least this often even inside the deadband
+
+
+class AdaptivePoller:
+    """
+    Decides per sample whether to report it and how long to wait for the next one.
+    Polls at min_interval during ramps, backs off geometrically to max_interval
+    in steady state, and reports only samples outside the deadband (plus a heartbeat).
+    """
+    def __init__(self, policy: AdaptivePollingPolicy):
+        self.policy = policy
+        self.interval = policy.min_interval
+        self._last_time = None
+        self._last_value = None
+        self._reported_time = None
+        self._reported_value = None
+
+
+    def update(self, t: float, value: Optional[float]):
+        """
+        t: monotonic sec, value: °C (None: no answer)
+        -> (report the sample?, next polling interval)
+        """
+        policy = self.policy
+        if value is None:
+            # keep polling fast until the device answers again
+            self.interval = policy.min_interval
+            return False, self.interval
+        if self._last_time is not None and t > self._last_time:
+            rate = abs(value - self._last_value) / (t - self._last_time)
+            if rate >= policy.rate_threshold:
+                self.interval = policy.min_interval
+            else:
+                self.interval = min(self.interval * policy.backoff, policy.max_interval)
+        self._last_time = t
+        self._last_value = value
+        report = (
+            self._reported_value is None
+            or abs(value - self._reported_value) > policy.deadband
+            or t - self._reported_time >= policy.heartbeat
+        )
+        if report:
+            self._reported_time = t
+            self._reported_value = value
+        return report, self.interval
@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+import serial
+from optris_cslaser_control import (
+    BAUDRATE, DATA_BITS, PARITY, STOP_BITS, TIMEOUT, REGISTERS, SNAPSHOT_FIELDS, CSLaserSnapshot, answer_deadline
+)
+from protocol_stats import ProtocolStats
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+POLL_INTERVAL = 0.002 # sec, fallback when the event loop cannot watch the port (e.g. Windows proactor)
+
+
+class AsyncOptrisCSLaserControl:
+    """
+    asyncio version of OptrisCSLaserControl
+    The port is opened non-blocking and waited on by the event loop, so many heads
+    can share one loop without a thread each. Requests to one port are served in
+    FIFO order (asyncio.Lock), each bounded by a cancellable timeout.
+    """
+    def __init__(self, port: str, baudrate: int = BAUDRATE, timeout: float = TIMEOUT):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.serial = None
+        self.stats = ProtocolStats()
+        self.reply_time_ns = None # unix ns of the last answer
+        self.reply_monotonic_ns = None # time.perf_counter_ns() of the last answer
+        self.reply_latency = None # sec, request -> last answer
+        self._lock = asyncio.Lock()
+        self._use_reader = True
+
+
+    @property
+    def is_connected(self) -> bool:
+        return self.serial is not None and self.serial.is_open
+
+
+    async def connect(self) -> None:
+        if self.is_connected:
+            return
+        try:
+            self.serial = serial.Serial(
+                port=self.port, baudrate=self.baudrate, timeout=0, bytesize=DATA_BITS,
+                parity=PARITY, stopbits=STOP_BITS, xonxoff=False)
+            try:
+                self.serial.dtr = False
+                await asyncio.sleep(0.5)
+                self.serial.dtr = True
+                await asyncio.sleep(0.5)
+            except OSError as e:
+                logging.warning(f"DTR reset not supported on {self.port}: {e}")
+            self.serial.reset_input_buffer()
+            self.serial.reset_output_buffer()
+            logging.info(f"Connected to Optris CS Laser on {self.port}.")
+        except serial.SerialException as e:
+            logging.error(f"Failed to connect to Optris CS Laser: {e}")
+
+
+    async def disconnect(self) -> None:
+        if self.serial is None:
+            logging.warning("No serial connection to disconnect.")
+            return
+        async with self._lock:
+            try:
+                self.serial.close()
+                logging.info("Disconnected from Optris CS Laser.")
+            except serial.SerialException as e:
+                logging.error(f"Failed to disconnect from Optris CS Laser: {e}")
+            self.serial = None
+
+
+    async def _wait_readable(self) -> None:
+        if self._use_reader:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            try:
+                loop.add_reader(self.serial.fileno(), future.set_result, None)
+            except (NotImplementedError, AttributeError):
+                self._use_reader = False
+            else:
+                try:
+                    await future
+                finally:
+                    loop.remove_reader(self.serial.fileno())
+                return
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+    async def _read_exact(self, read_bytes: int) -> bytes:
+        res = b""
+        while len(res) < read_bytes:
+            chunk = self.serial.read(read_bytes - len(res))
+            if chunk:
+                res += chunk
+            else:
+                await self._wait_readable()
+        return res
+
+
+    async def transact(self, hex_command: bytes, read_bytes: int, timeout: Optional[float] = None,
+                       name: Optional[str] = None) -> Optional[bytes]:
+        """
+        Write hex_command and wait for exactly read_bytes of answer.
+        timeout defaults to answer_deadline() of the command, capped by self.timeout.
+        Returns None on timeout or when not connected.
+        The round trip is recorded in self.stats under name (default: opcode).
+        """
+        if not self.is_connected:
+            logging.warning("No serial connection established. Cannot send command.")
+            return None
+        if timeout is None:
+            timeout = min(answer_deadline(self.baudrate, len(hex_command), read_bytes), self.timeout)
+        name = name or f"0x{hex_command[0]:02X}"
+        async with self._lock:
+            self.serial.reset_input_buffer()
+            start = time.perf_counter_ns()
+            self.serial.write(hex_command)
+            try:
+                res = await asyncio.wait_for(self._read_exact(read_bytes), timeout)
+                self.reply_monotonic_ns = time.perf_counter_ns()
+                self.reply_time_ns = time.time_ns()
+                self.reply_latency = (self.reply_monotonic_ns - start) / 1e9
+                self.stats.record(name, len(hex_command), len(res), read_bytes, self.reply_latency)
+                return res
+            except asyncio.TimeoutError:
+                self.stats.record(name, len(hex_command), 0, read_bytes, (time.perf_counter_ns() - start) / 1e9)
+                logging.error(f"Timeout waiting for answer to {hex_command.hex()} on {self.port}")
+                return None
+            except serial.SerialException as e:
+                logging.error(f"Failed to read response: {e}")
+                return None
+
+
+    async def read_register(self, field: str):
+        command, answer_length, decoder = REGISTERS[field]
+        res = await self.transact(bytes([command]), answer_length)
+        try:
+            return decoder(res)
+        except (TypeError, IndexError) as e:
+            self.stats.parse_failure(f"0x{command:02X}")
+            logging.error(f"Failed to parse {field.replace('_', ' ')}: {e}")
+            return None
+
+
+    async def read_snapshot(self, fields=SNAPSHOT_FIELDS) -> Optional[CSLaserSnapshot]:
+        unknown = [field for field in fields if field not in REGISTERS]
+        if unknown:
+            raise ValueError(f"Unknown snapshot fields: {unknown}")
+        hex_command = bytes(REGISTERS[field][0] for field in fields)
+        answer_length = sum(REGISTERS[field][1] for field in fields)
+        res = await self.transact(hex_command, answer_length, name="snapshot")
+        if res is None:
+            return None
+        snapshot = CSLaserSnapshot(
+            time_ns=self.reply_time_ns, monotonic_ns=self.reply_monotonic_ns, latency=self.reply_latency)
+        offset = 0
+        for field in fields:
+            _, length, decoder = REGISTERS[field]
+            setattr(snapshot, field, decoder(res[offset:offset + length]))
+            offset += length
+        return snapshot
+
+
+    async def serial_number(self) -> Optional[int]:
+        return await self.read_register("serial_number")
+
+
+    async def target_temperature(self) -> Optional[float]:
+        return await self.read_register("target_temperature")
+
+
+    async def head_temperature(self) -> Optional[float]:
+        return await self.read_register("head_temperature")
+
+
+    async def current_target_temperature(self) -> Optional[float]:
+        return await self.read_register("current_target_temperature")
+
+
+    async def emissivity(self) -> Optional[float]:
+        return await self.read_register("emissivity")
+
+
+    async def laser(self) -> Optional[bool]:
+        return await self.read_register("laser")
+
+
+    async def set_emissivity(self, new_emissivity: float) -> bool:
+        """
+        HEX command: 0x84, the device echoes the 2 value bytes
+        """
+        value = int(new_emissivity * 1000)
+        res = await self.transact(b'\x84' + value.to_bytes(2, "big"), 2)
+        if res is None or int.from_bytes(res, "big") != value:
+            logging.error("Failed to set emissivity correctly.")
+            return False
+        logging.info(f"Set emissivity to {new_emissivity}.")
+        return True
+
+
+    async def set_laser(self, state: bool) -> bool:
+        """
+        HEX command: 0x90, the device echoes the value byte
+        """
+        value = 1 if state else 0
+        res = await self.transact(bytes([0x90, value]), 1)
+        if res is None or res[0] != value:
+            logging.error("Failed to set laser state correctly.")
+            return False
+        logging.info(f"Set laser state to {'on' if state else 'off'}.")
+        return True
+
+
+async def read_snapshots(controllers, fields=SNAPSHOT_FIELDS) -> dict:
+    """
+    Read one snapshot from every controller concurrently
+    -> {port: CSLaserSnapshot or None}
+    """
+    snapshots = await asyncio.gather(*(controller.read_snapshot(fields) for controller in controllers))
+    return {controller.port: snapshot for controller, snapshot in zip(controllers, snapshots)}
+
+
+async def poll(controllers, interval: float, callback, fields=SNAPSHOT_FIELDS) -> None:
+    """
+    Poll all controllers every interval sec on the running loop until cancelled
+    callback(timestamp, {port: snapshot}) is called once per tick
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time()
+    while True:
+        snapshots = await read_snapshots(controllers, fields)
+        callback(time.time(), snapshots)
+        deadline += interval
+        await asyncio.sleep(max(0.0, deadline - loop.time()))
@@ -1,33 +1,141 @@
-from PyQt6.QtCore import QThread
-import time
+from PyQt6.QtCore import QThread, pyqtSignal
+from concurrent.futures import Future
+from deadline_scheduler import DeadlineScheduler, PollingStats, SKIP, SPIN_THRESHOLD
+import itertools
+import queue
 import logging
 
+MAX_SLEEP_STEP = 0.1 # sec, upper bound of a single sleep so stop() is served quickly
+PRIORITY_USER = 0 # user commands are served before anything else
+PRIORITY_ROUTINE = 10
+
 
 class BasePollingThread(QThread):
     """
     Abstract base class for polling thread
+    Polls on a drift-free monotonic deadline grid (see DeadlineScheduler);
+    policy decides what happens after a poll overruns its period (SKIP or CATCH_UP).
+    The thread is the only owner of the controller's port: other threads submit()
+    commands, which are served in priority order between polls instead of pausing them.
     """
-    def __init__(self, controller, interval:float, parent=None):
+    command_done = pyqtSignal(str, object) # name, result (None on failure)
+
+    def __init__(self, controller, interval:float, parent=None, policy:str = SKIP):
         super().__init__(parent)
         self.controller = controller
-        self.interval = interval
+        self.scheduler = DeadlineScheduler(interval, policy)
         self._running = True # run when polling thread instance is generated
+        self._commands = queue.PriorityQueue()
+        self._sequence = itertools.count() # FIFO among commands of the same priority
+
+
+    @property
+    def interval(self) -> float:
+        return self.scheduler.interval
+
+
+    @interval.setter
+    def interval(self, interval: float) -> None:
+        self.scheduler.interval = interval
+
+
+    @property
+    def stats(self) -> PollingStats:
+        return self.scheduler.stats
     
 
     def run(self):
+        self.scheduler.reset()
         while self._running:
+            self.wait_for_deadline()
+            if not self._running:
+                break
+            self.scheduler.tick()
             try:
                 data = self.get_data()
                 if data is not None:
                     self.emit_data(data)
             except Exception as e:
                 logging.error(f"{self.__class__.__name__} polling failed: {e}")
-            time.sleep(self.interval)
+            self.scheduler.advance()
+        self.cancel_commands()
+        stats = self.stats
+        logging.info(
+            f"{self.__class__.__name__} stopped: {stats.achieved_rate:.2f} Hz, "
+            f"jitter {stats.period_jitter * 1000:.1f} ms, {stats.overruns} overruns, {stats.skipped} skipped")
+
+
+    def wait_for_deadline(self):
+        """
+        Serve submitted commands until the deadline, then spin the last SPIN_THRESHOLD
+        At least one queued command is served per tick, so commands do not starve
+        while every poll overruns its period.
+        """
+        served = False
+        while self._running:
+            remaining = self.scheduler.time_to_deadline()
+            if remaining <= SPIN_THRESHOLD:
+                break
+            try:
+                command = self._commands.get(timeout=min(remaining - SPIN_THRESHOLD, MAX_SLEEP_STEP))
+            except queue.Empty:
+                continue
+            self.execute_command(*command[2:])
+            served = True
+        if not served and self._running:
+            try:
+                command = self._commands.get_nowait()
+            except queue.Empty:
+                pass
+            else:
+                self.execute_command(*command[2:])
+        self.scheduler.wait()
+
+
+    def submit(self, name: str, func, *args, priority: int = PRIORITY_USER) -> Future:
+        """
+        Run func(*args) on this thread between polls
+        -> Future of the return value; command_done(name, result) is emitted as well.
+        Once stopped, the Future fails with RuntimeError (callers are often GUI slots,
+        which must not raise).
+        """
+        future = Future()
+        if not self._running:
+            logging.error(f"{self.__class__.__name__} is stopped, cannot run {name}")
+            future.set_exception(RuntimeError(f"{self.__class__.__name__} is stopped, cannot run {name}"))
+            self.command_done.emit(name, None)
+            return future
+        self._commands.put((priority, next(self._sequence), name, func, args, future))
+        return future
+
+
+    def execute_command(self, name: str, func, args, future: Future) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = func(*args)
+        except Exception as e:
+            logging.error(f"{self.__class__.__name__} command {name} failed: {e}")
+            future.set_exception(e)
+            self.command_done.emit(name, None)
+            return
+        future.set_result(result)
+        self.command_done.emit(name, result)
+
+
+    def cancel_commands(self):
+        while True:
+            try:
+                command = self._commands.get_nowait()
+            except queue.Empty:
+                return
+            command[-1].cancel()
     
 
     def stop(self):
         self._running = False
         self.wait()
+        self.cancel_commands() # submitted while run() was finishing
     
 
     def get_data(self):
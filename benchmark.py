@@ -0,0 +1,272 @@
+"""
+Offline benchmarks of the hot paths against an in-memory fake serial port and offscreen Qt
+
+Example)
+    python benchmark.py --save-baseline          # measure and store benchmark_baseline.json
+    python benchmark.py                          # measure and fail (exit 1) on a regression
+    python benchmark.py --quick --only decode snapshot --no-baseline
+A missing baseline, or one measured on another system / Python version, fails the run
+(exit 2) unless --no-baseline is given.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from cslaser_emulator import CSLaserDeviceModel, EmulatorConfig, FakeSerial, sine
+from optris_cslaser_control import OptrisCSLaserControl, decode_temperature
+from sample_buffer import SampleRingBuffer
+from rolling_stats import RollingStats
+from decimated_series import DecimatedSeries
+from data_logger import DataLogger
+from binary_logger import BinaryLogger
+
+logging.getLogger().setLevel(logging.WARNING) # the modules configure INFO
+
+BASELINE_PATH = Path(__file__).with_name("benchmark_baseline.json")
+TOLERANCE = 0.3 # a benchmark regresses when it is this much slower than its baseline
+MEMORY_TOLERANCE = 1 << 20 # bytes of extra growth allowed over the baseline
+LOWER_IS_BETTER = ("drain_us_per_row", "redraw_p99_ms") # gated with TOLERANCE like ops_per_sec
+POLLING_FIELDS = ("target_temperature", "head_temperature")
+
+
+def fake_controller() -> OptrisCSLaserControl:
+    config = EmulatorConfig(byte_timing=False, target_temperature=sine(300.0, 50.0, 60.0), seed=0)
+    controller = OptrisCSLaserControl("fake")
+    controller.serial = FakeSerial(CSLaserDeviceModel(config))
+    return controller
+
+
+def measure(func, iterations: int, sample_every: int = 1) -> dict:
+    """
+    Call func(i) iterations times -> ops/s and latency percentiles of single calls
+    """
+    latencies = np.empty((iterations + sample_every - 1) // sample_every, dtype="f8")
+    gc.collect()
+    start = time.perf_counter()
+    for i in range(iterations):
+        if i % sample_every == 0:
+            t0 = time.perf_counter()
+            func(i)
+            latencies[i // sample_every] = time.perf_counter() - t0
+        else:
+            func(i)
+    elapsed = time.perf_counter() - start
+    return {
+        "ops_per_sec": iterations / elapsed,
+        "p50_us": float(np.percentile(latencies, 50) * 1e6),
+        "p99_us": float(np.percentile(latencies, 99) * 1e6),
+        "max_us": float(latencies.max() * 1e6),
+    }
+
+
+def bench_decode(n: int) -> dict:
+    answers = [bytes([i % 256, (i * 7) % 256]) for i in range(1024)]
+    return measure(lambda i: decode_temperature(answers[i & 1023]), n, sample_every=16)
+
+
+def bench_snapshot(n: int) -> dict:
+    controller = fake_controller()
+    return measure(lambda i: controller.read_snapshot(POLLING_FIELDS), n)
+
+
+def bench_polling_loop(n: int) -> dict:
+    """
+    CSLaserPollingThread.run() on the calling thread, polling back-to-back:
+    scheduler + read_snapshot + sample buffer + rolling statistics per tick
+    """
+    from cslaser_widget import CSLaserPollingThread
+    sample_buffer = SampleRingBuffer(capacity=1 << 16, fields=POLLING_FIELDS)
+
+    class CountingPollingThread(CSLaserPollingThread):
+        def emit_data(self, data):
+            super().emit_data(data)
+            if sample_buffer.total_written >= n:
+                self._running = False
+
+    thread = CountingPollingThread(fake_controller(), 1e-6, sample_buffer, rolling_stats=RollingStats())
+    start = time.perf_counter()
+    thread.run()
+    elapsed = time.perf_counter() - start
+    stats = thread.stats
+    return {"ops_per_sec": n / elapsed, "mean_period_us": stats.mean_period * 1e6,
+            "jitter_us": stats.period_jitter * 1e6}
+
+
+def bench_csv_logger(n: int) -> dict:
+    row = {"timestamp": "2026-01-01 00:00:00.000000", "target_temperature": 300.0, "head_temperature": 25.0}
+    with tempfile.TemporaryDirectory() as folder:
+        logger = DataLogger(Path(folder) / "bench.csv")
+        result = measure(lambda i: logger.write_csv(row), n, sample_every=8)
+        # ops_per_sec only measures queueing: the rows reach the file in close()
+        start = time.perf_counter()
+        logger.close()
+        result["drain_sec"] = time.perf_counter() - start
+        result["drain_us_per_row"] = result["drain_sec"] / n * 1e6
+    return result
+
+
+def bench_binary_logger(n: int) -> dict:
+    row = {"timestamp_ns": 1_767_225_600_000_000_000, "target_temperature": 300.0, "head_temperature": 25.0}
+    with tempfile.TemporaryDirectory() as folder:
+        with BinaryLogger(Path(folder) / "bench.obr", POLLING_FIELDS) as logger:
+            return measure(lambda i: logger.write(row), n, sample_every=8)
+
+
+def bench_chart(n: int) -> dict:
+    """
+    ChartWidget: append n samples, redraw every 1000 (~30 fps at 30 kHz)
+    """
+    from PyQt6.QtWidgets import QApplication
+    from chart_widget import ChartWidget
+    app = QApplication.instance() or QApplication([])
+
+    class Collector:
+        plot_keys = ["temperature"]
+        columns = ["temperature"]
+
+    chart = ChartWidget(Collector())
+    chart.resize(800, 400)
+    chart.show()
+    chart.initialize_chart()
+    redraws = []
+
+    def append(i):
+        chart.series.append(i / 60.0, {"temperature": 300.0 + 50.0 * np.sin(i / 500.0)})
+        if i % 1000 == 999:
+            chart.mark_dirty()
+            t0 = time.perf_counter()
+            chart.redraw()
+            app.processEvents()
+            redraws.append(time.perf_counter() - t0)
+
+    result = measure(append, n, sample_every=16)
+    result["redraw_p99_ms"] = float(np.percentile(redraws, 99) * 1e3) if redraws else 0.0
+    chart.redraw_timer.stop()
+    chart.close()
+    return result
+
+
+def bench_memory(n: int) -> dict:
+    """
+    Long simulated run: read_snapshot -> sample buffer -> statistics -> chart series.
+    Memory growth over the second half of the run should stay ~0 (preallocated stores).
+    """
+    controller = fake_controller()
+    sample_buffer = SampleRingBuffer(capacity=1 << 16, fields=POLLING_FIELDS)
+    rolling_stats = RollingStats()
+    series = DecimatedSeries(["target_temperature"], capacity=1 << 14)
+    tracemalloc.start()
+    start = time.perf_counter()
+    half = None
+    for i in range(n):
+        snapshot = controller.read_snapshot(POLLING_FIELDS)
+        timestamp = i * 0.01
+        sample_buffer.append_snapshot(timestamp, snapshot)
+        rolling_stats.update(timestamp, snapshot.target_temperature)
+        series.append(timestamp, {"target_temperature": snapshot.target_temperature})
+        if i == n // 2:
+            gc.collect()
+            half = tracemalloc.get_traced_memory()[0]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    end, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ops_per_sec": n / elapsed, "mem_growth_bytes": end - half, "mem_peak_bytes": peak}
+
+
+BENCHMARKS = {
+    # name: (function, iterations, quick iterations)
+    "decode": (bench_decode, 1_000_000, 100_000),
+    "snapshot": (bench_snapshot, 100_000, 10_000),
+    "polling_loop": (bench_polling_loop, 100_000, 10_000),
+    "csv_logger": (bench_csv_logger, 200_000, 20_000),
+    "binary_logger": (bench_binary_logger, 500_000, 50_000),
+    "chart": (bench_chart, 200_000, 20_000),
+    "memory": (bench_memory, 300_000, 30_000),
+}
+
+
+def machine() -> dict:
+    """
+    What a baseline is only comparable on: timings of another OS or interpreter are meaningless
+    """
+    return {"python": ".".join(platform.python_version_tuple()[:2]), "system": platform.system(),
+            "machine": platform.machine()}
+
+
+def compare(results: dict, baseline: dict, tolerance: float = TOLERANCE) -> list:
+    """
+    -> messages of the benchmarks which regressed against baseline
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result["ops_per_sec"] < reference["ops_per_sec"] * (1.0 - tolerance):
+            regressions.append(
+                f"{name}: {result['ops_per_sec']:.0f} ops/s < baseline {reference['ops_per_sec']:.0f} ops/s")
+        if "mem_growth_bytes" in reference and \
+                result["mem_growth_bytes"] > reference["mem_growth_bytes"] + MEMORY_TOLERANCE:
+            regressions.append(
+                f"{name}: memory grew {result['mem_growth_bytes']} B > baseline {reference['mem_growth_bytes']} B")
+        for key in LOWER_IS_BETTER:
+            if key in reference and key in result and result[key] > reference[key] * (1.0 + tolerance):
+                regressions.append(f"{name}: {key} {result[key]:.3f} > baseline {reference[key]:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optris CS Laser hot path benchmarks")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS.keys()), default=list(BENCHMARKS.keys()))
+    parser.add_argument("--quick", action="store_true", help="10x fewer iterations")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--no-baseline", action="store_true", help="only measure, do not compare against a baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown, 0.3 = 30 %%")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only:
+        func, iterations, quick_iterations = BENCHMARKS[name]
+        iterations = quick_iterations if args.quick else iterations
+        results[name] = func(iterations)
+        details = ", ".join(f"{key}={value:,.1f}" for key, value in results[name].items())
+        print(f"{name:>14}: n={iterations:,} {details}", flush=True)
+
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update(results)
+        baseline["_machine"] = machine()
+        args.baseline.write_text(json.dumps(baseline, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if args.no_baseline:
+        return
+    if not args.baseline.exists():
+        print(f"No baseline {args.baseline}: run with --save-baseline first, or pass --no-baseline")
+        sys.exit(2)
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("_machine") != machine():
+        print(f"Baseline {args.baseline} was measured on {baseline.get('_machine')}, this is {machine()}: "
+              f"run with --save-baseline on this machine, or pass --no-baseline")
+        sys.exit(2)
+    regressions = compare(results, baseline, args.tolerance)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Binary recording format (.obr)
+
+    magic        8 bytes  b"OPTRISB1"
+    header size  uint32 little endian
+    header       JSON (utf-8): {"version", "columns": [[name, dtype], ...], "metadata": {...}}
+    padding      up to a multiple of DATA_ALIGNMENT
+    records      fixed-width little endian records, timestamp_ns (int64) + one float32 per column
+
+Records are appended in chunks of chunk_rows, or earlier once flush_interval has
+passed since the last flush (bounds the loss on a crash at slow rates). The data section maps as a single
+NumPy structured array, so every column is a zero-copy (strided) view of the file.
+A trailing incomplete record (crash while writing) is ignored by the reader.
+"""
+import json
+import logging
+import struct
+import time
+from pathlib import Path
+import numpy as np
+from data_logger import FLUSH_INTERVAL, to_ns
+
+MAGIC = b"OPTRISB1"
+VERSION = 1
+DATA_ALIGNMENT = 64 # bytes
+CHUNK_ROWS = 1024
+TIMESTAMP_COLUMN = "timestamp_ns"
+
+
+def record_dtype(columns) -> np.dtype:
+    return np.dtype([(TIMESTAMP_COLUMN, "<i8")] + [(column, "<f4") for column in columns])
+
+
+class BinaryLogger:
+    """
+    Appends rows (dicts or objects with to_dict()) to a .obr file.
+    Keys which are not columns are ignored, missing values are stored as NaN.
+    """
+    def __init__(self, path, columns, metadata=None, chunk_rows: int = CHUNK_ROWS,
+                 flush_interval: float = FLUSH_INTERVAL):
+        self._path = Path(path)
+        self.columns = [column for column in columns if column != TIMESTAMP_COLUMN]
+        self.dtype = record_dtype(self.columns)
+        self._chunk = np.zeros(chunk_rows, dtype=self.dtype)
+        self._pending = 0
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        self._file = open(self._path, "wb")
+        header = json.dumps({
+            "version": VERSION,
+            "columns": [[name, self.dtype[name].str] for name in self.dtype.names],
+            "metadata": metadata or {},
+        }).encode("utf-8")
+        head = MAGIC + struct.pack("<I", len(header)) + header
+        padding = -len(head) % DATA_ALIGNMENT
+        self._file.write(head + b"\0" * padding)
+        self._file.flush()
+
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+
+    def write(self, data_object) -> None:
+        data_dict = data_object if isinstance(data_object, dict) else data_object.to_dict()
+        row = self._chunk[self._pending]
+        row[TIMESTAMP_COLUMN] = to_ns(data_dict.get(TIMESTAMP_COLUMN, data_dict.get("timestamp")))
+        for column in self.columns:
+            value = data_dict.get(column)
+            row[column] = np.nan if value is None else value
+        self._pending += 1
+        if self._pending == len(self._chunk) or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+
+    def write_block(self, block: np.ndarray) -> None:
+        """
+        Append a structured array at once (SampleRingBuffer rows: time_ns or timestamp + columns)
+        """
+        if len(block) == 0:
+            return
+        self.flush()
+        records = np.empty(len(block), dtype=self.dtype)
+        if "time_ns" in block.dtype.names:
+            records[TIMESTAMP_COLUMN] = block["time_ns"]
+        else:
+            records[TIMESTAMP_COLUMN] = np.round(block["timestamp"] * 1e6).astype("i8") * 1000
+        for column in self.columns:
+            records[column] = block[column] if column in block.dtype.names else np.nan
+        self._file.write(records.tobytes())
+
+
+    def flush(self) -> None:
+        if self._pending:
+            self._file.write(self._chunk[:self._pending].tobytes())
+            self._pending = 0
+        self._file.flush()
+        self._last_flush = time.monotonic()
+
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class BinaryLogReader:
+    """
+    Memory-mapped view of a .obr file
+    reader["target_temperature"] -> np.ndarray view (no copy, no parsing)
+    """
+    def __init__(self, path):
+        self._path = Path(path)
+        with open(self._path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self._path} is not an Optris binary recording")
+            (header_size,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_size).decode("utf-8"))
+        if header.get("version") != VERSION:
+            raise ValueError(f"Unsupported recording version: {header.get('version')}")
+        self.metadata = header["metadata"]
+        self.dtype = np.dtype([(name, dtype) for name, dtype in header["columns"]])
+        head_size = len(MAGIC) + 4 + header_size
+        data_offset = head_size + (-head_size % DATA_ALIGNMENT)
+        rows = (self._path.stat().st_size - data_offset) // self.dtype.itemsize
+        if rows > 0:
+            self.data = np.memmap(self._path, dtype=self.dtype, mode="r", offset=data_offset, shape=(rows,))
+        else:
+            self.data = np.empty(0, dtype=self.dtype)
+        if rows < 0:
+            logging.warning(f"{self._path} has no data section")
+
+
+    @property
+    def columns(self) -> list:
+        return [name for name in self.dtype.names if name != TIMESTAMP_COLUMN]
+
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.data[column]
+
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.data[TIMESTAMP_COLUMN].view("datetime64[ns]")
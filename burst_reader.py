@@ -0,0 +1,213 @@
+"""
+Burst (continuous output) mode reader
+
+In burst mode the head sends frames without being polled:
+
+    sync (default AA AA) | u16 big endian raw value per field | optional XOR checksum of the values
+
+Each raw value is decoded like the polled answers, (raw - 1000) / 10 °C.
+The head has to be configured for burst mode (output fields, rate) beforehand,
+e.g. with the vendor software; this module only reads the stream.
+"""
+from dataclasses import dataclass
+import logging
+import threading
+import time
+from typing import Callable, Optional
+import numpy as np
+import serial
+from optris_cslaser_control import BITS_PER_BYTE
+from sample_buffer import SampleRingBuffer
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+BURST_SYNC = b"\xAA\xAA"
+BURST_FIELDS = ("target_temperature", "head_temperature")
+CHUNK_BYTES = 4096 # upper bound of one read
+
+
+@dataclass(frozen=True)
+class BurstFormat:
+    sync: bytes = BURST_SYNC
+    fields: tuple = BURST_FIELDS
+    checksum: bool = False # XOR of the value bytes after the values
+
+
+    @property
+    def frame_size(self) -> int:
+        return len(self.sync) + 2 * len(self.fields) + (1 if self.checksum else 0)
+
+
+    def encode(self, values) -> bytes:
+        """
+        Frame of raw values (emulator / tests)
+        """
+        payload = b"".join(int(raw).to_bytes(2, "big") for raw in values)
+        if self.checksum:
+            payload += bytes([np.bitwise_xor.reduce(np.frombuffer(payload, dtype=np.uint8))])
+        return self.sync + payload
+
+
+    def dtype(self) -> np.dtype:
+        return np.dtype([("timestamp", "f8"), ("time_ns", "i8")] + [(field, "f8") for field in self.fields])
+
+
+def find_frames(data: np.ndarray, fmt: BurstFormat) -> np.ndarray:
+    """
+    Start offsets of the frames in data (uint8)
+    A frame is accepted when the next sync follows exactly one frame later, so value
+    bytes which happen to look like the sync and frames cut short by lost bytes are
+    rejected. The newest frame is therefore held back until the next sync arrives.
+    In a run of sync bytes (a value ending in AA right before AA AA) only the last
+    pair is a start, or with a checksum the last one whose checksum is valid.
+    """
+    size = fmt.frame_size
+    if len(data) < size:
+        return np.empty(0, dtype=np.intp)
+    candidates = np.flatnonzero(data[:len(data) - len(fmt.sync) + 1] == fmt.sync[0])
+    for i in range(1, len(fmt.sync)):
+        candidates = candidates[data[candidates + i] == fmt.sync[i]]
+    run_end = np.append(np.diff(candidates) != 1, True)
+    if not run_end.all():
+        run_start = np.append(True, run_end[:-1])
+        if fmt.checksum:
+            candidates = np.array([
+                next((start for start in range(last, first - 1, -1) if _checksum_ok(data, start, fmt)), last)
+                for first, last in zip(candidates[run_start].tolist(), candidates[run_end].tolist())
+            ], dtype=np.intp)
+        else:
+            candidates = candidates[run_end]
+    starts = candidates[np.isin(candidates + size, candidates)]
+    if len(starts) > 1 and np.any(np.diff(starts) < size):
+        # sync pattern inside the values of a chained frame: keep a start only
+        # if it does not overlap the previously kept frame
+        kept = []
+        next_free = -1
+        for start in starts.tolist():
+            if start >= next_free:
+                kept.append(start)
+                next_free = start + size
+        starts = np.array(kept, dtype=np.intp)
+    return starts
+
+
+def _checksum_ok(data: np.ndarray, start: int, fmt: BurstFormat) -> bool:
+    end = start + fmt.frame_size
+    if end > len(data):
+        return False
+    return int(np.bitwise_xor.reduce(data[start + len(fmt.sync):end - 1])) == int(data[end - 1])
+
+
+def decode_frames(data: np.ndarray, starts: np.ndarray, fmt: BurstFormat):
+    """
+    -> ({field: °C as float64 array}, valid mask) for the frames at starts
+    """
+    offsets = len(fmt.sync) + 2 * np.arange(len(fmt.fields))
+    index = starts[:, None] + offsets[None, :]
+    raw = (data[index].astype(np.uint16) << 8) | data[index + 1]
+    temperatures = (raw.astype(np.float64) - 1000.0) / 10.0
+    valid = np.ones(len(starts), dtype=bool)
+    if fmt.checksum:
+        payload = starts[:, None] + len(fmt.sync) + np.arange(2 * len(fmt.fields))[None, :]
+        valid = np.bitwise_xor.reduce(data[payload], axis=1) == data[starts + fmt.frame_size - 1]
+    return {field: temperatures[:, i] for i, field in enumerate(fmt.fields)}, valid
+
+
+class BurstReader:
+    """
+    Reads the burst stream of a connected OptrisCSLaserControl on a background thread
+    and appends whole decoded blocks to sample_buffer (SampleRingBuffer.append_block).
+    Frames of one read are stamped backwards from its arrival time, frame_period apart
+    (default: transmission time of a frame at the baudrate) but never before the previous read.
+    The controller must not be polled while the reader runs.
+    """
+    def __init__(self, controller, sample_buffer: SampleRingBuffer, fmt: BurstFormat = BurstFormat(),
+                 frame_period: Optional[float] = None, on_block: Optional[Callable[[np.ndarray], None]] = None):
+        unknown = [field for field in fmt.fields if field not in sample_buffer.fields]
+        if unknown:
+            raise ValueError(f"Burst fields not in the sample buffer: {unknown}")
+        self.controller = controller
+        self.sample_buffer = sample_buffer
+        self.fmt = fmt
+        self.frame_period = frame_period or fmt.frame_size * BITS_PER_BYTE / controller.baudrate
+        self.on_block = on_block
+        self.stats = {"bytes": 0, "frames": 0, "skipped_bytes": 0, "checksum_errors": 0}
+        self._pending = bytearray()
+        self._last_ns = None # arrival time of the previous block
+        self._running = False
+        self._thread = None
+
+
+    def start(self) -> None:
+        if self.controller.serial is None or not self.controller.serial.is_open:
+            raise RuntimeError("Controller is not connected")
+        self.controller.serial.reset_input_buffer()
+        self._pending.clear()
+        self._last_ns = None
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="BurstReader", daemon=True)
+        self._thread.start()
+
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        logging.info(f"Burst reader stopped: {self.stats}")
+
+
+    def _run(self) -> None:
+        port = self.controller.serial
+        port.timeout = max(self.frame_period * 4, 0.01)
+        while self._running:
+            try:
+                chunk = port.read(min(max(port.in_waiting, self.fmt.frame_size), CHUNK_BYTES))
+            except (serial.SerialException, OSError) as e:
+                logging.error(f"Burst read failed: {e}")
+                break
+            if not chunk:
+                continue
+            block = self.feed(chunk, time.time_ns())
+            if len(block):
+                self.sample_buffer.append_block(block)
+                if self.on_block is not None:
+                    self.on_block(block)
+
+
+    def feed(self, chunk: bytes, arrival_ns: int) -> np.ndarray:
+        """
+        Add received bytes -> structured array (fmt.dtype()) of the complete frames
+        """
+        fmt = self.fmt
+        self.stats["bytes"] += len(chunk)
+        self._pending += chunk
+        data = np.frombuffer(self._pending, dtype=np.uint8)
+        starts = find_frames(data, fmt)
+        if len(starts) == 0:
+            # keep enough bytes to chain the next frame, drop older garbage
+            excess = max(len(data) - 2 * fmt.frame_size, 0)
+            self.stats["skipped_bytes"] += excess
+            del data
+            del self._pending[:excess]
+            return np.empty(0, dtype=fmt.dtype())
+        values, valid = decode_frames(data, starts, fmt)
+        consumed = int(starts[-1]) + fmt.frame_size
+        self.stats["skipped_bytes"] += consumed - len(starts) * fmt.frame_size
+        self.stats["checksum_errors"] += int(len(valid) - np.count_nonzero(valid))
+        del data # release the buffer export before resizing
+        del self._pending[:consumed]
+        n = int(np.count_nonzero(valid))
+        block = np.empty(n, dtype=fmt.dtype())
+        # frame_period apart, squeezed if more frames arrived than fit since the previous block
+        period_ns = int(self.frame_period * 1e9)
+        if self._last_ns is not None and n:
+            period_ns = min(period_ns, (arrival_ns - self._last_ns) // n)
+        block["time_ns"] = arrival_ns - period_ns * np.arange(n - 1, -1, -1, dtype=np.int64)
+        if n:
+            self._last_ns = arrival_ns
+        block["timestamp"] = block["time_ns"] / 1e9
+        for field, temperatures in values.items():
+            block[field] = temperatures[valid]
+        self.stats["frames"] += n
+        return block
@@ -1,9 +1,11 @@
 from PyQt6.QtWidgets import (
     QGroupBox, QPushButton, QFileDialog, QMessageBox, QVBoxLayout, QFormLayout,
-    QSpinBox
+    QSpinBox, QComboBox
 )
 from PyQt6.QtCore import QTimer
-from data_logger import DataLogger
+from data_logger import DataLogger, default_filename
+from binary_logger import BinaryLogger
+from decimated_series import DecimatedSeries
 import numpy as np
 import pyqtgraph as pg
 from pathlib import Path
@@ -12,10 +14,7 @@ from datetime import datetime
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-
-def default_filename() -> str:
-    now = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return f"{now}_pyrometer"
+REDRAW_INTERVAL = 33 # msec, ~30 fps regardless of the sample rate
 
 
 class ChartWidget(QGroupBox):
@@ -24,13 +23,18 @@ class ChartWidget(QGroupBox):
         self.collector = data_collector
         self.record_timer = None
         self.start_timestamp = None
-
+        self.series = None
+        self.plots = {}
+        self._dirty = False
 
         # UI elements
         self.record_interval_spin = QSpinBox()
         self.record_interval_spin.setRange(1, 600) # sec
         self.record_interval_spin.setSingleStep(1)
         self.record_interval_spin.setSuffix("sec")
+        self.format_combo = QComboBox()
+        self.format_combo.addItem("CSV (.csv)", "csv")
+        self.format_combo.addItem("Binary (.obr)", "obr")
         self.record_btn = QPushButton("Start Record")
         self.record_btn.clicked.connect(self.toggle_record)
 
@@ -39,11 +43,17 @@ class ChartWidget(QGroupBox):
         self.plot_widget.showGrid(x=True, y=True)
         self.plot_widget.setLabel("left", "T", units="°C")
         self.plot_widget.setLabel("bottom", "Time", units="min")
+        self.plot_widget.getViewBox().sigXRangeChanged.connect(self.mark_dirty)
+        self.plot_widget.getViewBox().sigResized.connect(self.mark_dirty)
+        self.redraw_timer = QTimer(self)
+        self.redraw_timer.timeout.connect(self.redraw)
+        self.redraw_timer.start(REDRAW_INTERVAL)
 
         # layout
         layout = QVBoxLayout()
         record_form = QFormLayout()
         record_form.addRow("Record Interval", self.record_interval_spin)
+        record_form.addRow("Format", self.format_combo)
         record_form.addRow("", self.record_btn)
         layout.addLayout(record_form)
         layout.addWidget(self.plot_widget)
@@ -51,33 +61,66 @@ class ChartWidget(QGroupBox):
 
 
     def initialize_chart(self):
-        self.x_data = []
-        self.y_data = []
-        self.strat_time = None
-        self.plot = self.plot_widget.plot(pen="b")
+        plot_keys = self.collector.plot_keys
+        self.series = DecimatedSeries(plot_keys)
+        self.start_timestamp = None
+        self.plot_widget.clear()
+        self.plots = {}
+        for i, key in enumerate(plot_keys):
+            self.plots[key] = self.plot_widget.plot(pen=pg.intColor(i, hues=max(len(plot_keys), 1)), name=key)
+
+
+    def mark_dirty(self, *args) -> None:
+        self._dirty = True
+
+
+    def redraw(self) -> None:
+        """
+        Draw only the min/max envelope of the visible range, ~2 points per pixel column
+        """
+        if not self._dirty or self.series is None or len(self.series) == 0:
+            return
+        self._dirty = False
+        view_box = self.plot_widget.getViewBox()
+        if view_box.autoRangeEnabled()[0]:
+            x_start, x_end = self.series.x_range()
+        else:
+            x_start, x_end = view_box.viewRange()[0]
+        x, ys = self.series.render(x_start, x_end, view_box.width())
+        for key, plot in self.plots.items():
+            plot.setData(x, ys[key], connect="finite")
     
 
     def __del__(self):
         try:
             self.record_timer.stop()
+            self.data_logger.close()
         except Exception:
             pass
     
 
     def write_data(self) -> None:
-        data_dict = self.data_collector.collect_data()
-        self.data_logger.write_csv(data_dict)
-        try:
-            timestamp = datetime.fromisoformat(data_dict["timestamp"])
-            temperature = data_dict["temperature"]
-            if self.start_timestamp is None:
-                self.start_timestamp = timestamp
-            elapsed_min = (timestamp - self.start_timestamp).total_seconds() / 60.0
-            self.x_data.append(elapsed_min)
-            self.y_data.append(temperature)
-        except Exception as e:
-            logging.error(f"Fail to plot data: {e}")
-            return
+        # every sample polled since the last call, stamped when it was read
+        for data_dict in self.collector.collect_rows():
+            try:
+                self.data_logger.write(data_dict)
+            except RuntimeError as e:
+                # writer thread died: stop instead of raising out of the timer slot
+                logging.error(f"Recording stopped: {e}")
+                self.record_timer.stop()
+                self.record_timer = None
+                self.record_btn.setText("Start Record")
+                QMessageBox.critical(self, "Recording Error", f"Recording stopped:\n{e}")
+                return
+            try:
+                timestamp = datetime.fromisoformat(data_dict["timestamp"])
+                if self.start_timestamp is None:
+                    self.start_timestamp = timestamp
+                elapsed_min = (timestamp - self.start_timestamp).total_seconds() / 60.0
+                self.series.append(elapsed_min, data_dict)
+                self._dirty = True
+            except Exception as e:
+                logging.error(f"Fail to plot data: {e}")
 
 
     def toggle_record(self):
@@ -88,11 +131,15 @@ class ChartWidget(QGroupBox):
                 return
             folder_path = Path(folder)
             default_name = default_filename()
-            csv_path = folder_path / f"{default_name}.csv"
-            self.data_logger = DataLogger(csv_path)
+            if self.format_combo.currentData() == "obr":
+                self.data_logger = BinaryLogger(folder_path / f"{default_name}.obr", self.collector.columns,
+                                                metadata=self.collector.metadata())
+            else:
+                self.data_logger = DataLogger(folder_path / f"{default_name}.csv")
+            self.initialize_chart()
             # write first data
+            self.collector.start()
             self.write_data()
-            self.initialize_chart()
             self.record_timer = QTimer(self)
             self.record_timer.timeout.connect(self.write_data)
             try:
@@ -102,12 +149,16 @@ class ChartWidget(QGroupBox):
                 self.record_timer = None
                 return
             self.record_btn.setText("Stop Record")
-            QMessageBox.information(self, "Recording Start", f"save path: \n{self.data_logger.csv_path}\n{self.data_logger.yml_path}\n\nRecording start")
+            QMessageBox.information(self, "Recording Start", f"save path: \n{self.data_logger.path}\n\nRecording start")
             logging.info("LITMoS data recording started")
         else:
             self.record_timer.stop()
             self.record_timer = None
-            QMessageBox.information(self, "Recording Stop", f"save path: \n{self.data_logger.csv_path}\n{self.data_logger.yml_path}\n\nRecording stop")
+            try:
+                self.data_logger.close()
+            except RuntimeError as e:
+                logging.error(f"Failed to close the recording: {e}")
+            QMessageBox.information(self, "Recording Stop", f"save path: \n{self.data_logger.path}\n\nRecording stop")
             logging.info("LITMoS data recording stopped")
             self.record_btn.setText("Start Record")
 
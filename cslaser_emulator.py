@@ -0,0 +1,342 @@
+"""
+Pseudo-terminal emulator of the Optris CS Laser serial protocol
+The pty (CSLaserEmulator) is Linux only; CSLaserDeviceModel is importable everywhere.
+
+Example)
+    python cslaser_emulator.py --waveform sine --response-delay 0.005 --drop 0.01
+    python cslaser_emulator.py --burst --baudrate 115200 --truncate 0.001
+    -> prints the pty path to pass to OptrisCSLaserControl(port=...)
+"""
+import argparse
+import logging
+import math
+import os
+import random
+import select
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+from burst_reader import BurstFormat
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+BITS_PER_BYTE = 10 # start bit + 8 data bits + stop bit
+
+
+def constant(value: float) -> Callable[[float], float]:
+    return lambda t: value
+
+
+def sine(mean: float, amplitude: float, period: float) -> Callable[[float], float]:
+    return lambda t: mean + amplitude * math.sin(2 * math.pi * t / period)
+
+
+def ramp(start: float, rate: float, end: float) -> Callable[[float], float]:
+    """
+    rate in °C/sec, holds at end
+    """
+    if rate >= 0:
+        return lambda t: min(start + rate * t, end)
+    return lambda t: max(start + rate * t, end)
+
+
+WAVEFORMS = {
+    "constant": constant(300.0),
+    "sine": sine(300.0, 50.0, 60.0),
+    "ramp": ramp(25.0, 1.0, 1000.0),
+}
+
+
+def encode_temperature(temperature: float) -> bytes:
+    raw = min(max(int(round(temperature * 10)) + 1000, 0), 0xFFFF)
+    return raw.to_bytes(2, "big")
+
+
+@dataclass
+class EmulatorConfig:
+    baudrate: int = 9600
+    byte_timing: bool = True # delay each answer byte by its transmission time at baudrate
+    response_delay: float = 0.0 # sec, device processing time before answering
+    drop_probability: float = 0.0 # answer is not sent at all
+    truncate_probability: float = 0.0 # only a part of the answer is sent
+    noise: float = 0.0 # °C, gaussian noise on target temperature
+    serial_number: int = 123456
+    emissivity: float = 0.95
+    laser: bool = False
+    head_temperature: Callable[[float], float] = field(default_factory=lambda: constant(25.0))
+    target_temperature: Callable[[float], float] = field(default_factory=lambda: constant(300.0))
+    seed: Optional[int] = None
+    burst: bool = False # stream burst frames continuously (truncate_probability cuts frames)
+    burst_rate: float = 0.0 # frames/sec, 0: as fast as the baudrate allows
+    burst_format: BurstFormat = field(default_factory=BurstFormat)
+
+
+class CSLaserDeviceModel:
+    """
+    Protocol state machine of the device, independent of the transport
+    feed(request bytes) -> answer bytes
+    """
+    def __init__(self, config: EmulatorConfig):
+        self.config = config
+        self.emissivity = config.emissivity
+        self.laser = config.laser
+        self.random = random.Random(config.seed)
+        self._start = time.monotonic()
+        self._pending = b""
+
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+
+    def target_temperature(self) -> float:
+        temperature = self.config.target_temperature(self.elapsed())
+        if self.config.noise:
+            temperature += self.random.gauss(0.0, self.config.noise)
+        return temperature
+
+
+    def feed(self, data: bytes) -> bytes:
+        self._pending += data
+        answer = b""
+        while self._pending:
+            command = self._pending[0]
+            if command == 0x84:
+                if len(self._pending) < 3:
+                    break
+                value = self._pending[1:3]
+                self._pending = self._pending[3:]
+                self.emissivity = int.from_bytes(value, "big") / 1000.0
+                answer += value
+            elif command == 0x90:
+                if len(self._pending) < 2:
+                    break
+                value = self._pending[1]
+                self._pending = self._pending[2:]
+                self.laser = value == 1
+                answer += bytes([value])
+            else:
+                self._pending = self._pending[1:]
+                answer += self.answer(command)
+        return answer
+
+
+    def burst_frame(self) -> bytes:
+        raw = []
+        for name in self.config.burst_format.fields:
+            if name == "head_temperature":
+                temperature = self.config.head_temperature(self.elapsed())
+            else:
+                temperature = self.target_temperature()
+            raw.append(int.from_bytes(encode_temperature(temperature), "big"))
+        return self.config.burst_format.encode(raw)
+
+
+    def answer(self, command: int) -> bytes:
+        if command in (0x01, 0x03):
+            return encode_temperature(self.target_temperature())
+        if command == 0x02:
+            return encode_temperature(self.config.head_temperature(self.elapsed()))
+        if command == 0x04:
+            return int(round(self.emissivity * 1000)).to_bytes(2, "big")
+        if command == 0x0E:
+            return self.config.serial_number.to_bytes(3, "big")
+        if command == 0x10:
+            return b"\x01" if self.laser else b"\x00"
+        logging.warning(f"Emulator: unknown command 0x{command:02X} ignored")
+        return b""
+
+
+class FakeSerial:
+    """
+    In-memory stand-in for serial.Serial answering through CSLaserDeviceModel
+    (no pty, no timing: benchmarks and tests on every platform)
+    """
+    def __init__(self, model: CSLaserDeviceModel):
+        self.model = model
+        self.is_open = True
+        self.timeout = None
+        self.dtr = True
+        self._input = bytearray()
+
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self._input)
+
+
+    def write(self, data: bytes) -> int:
+        self._input += self.model.feed(data)
+        return len(data)
+
+
+    def read(self, size: int = 1) -> bytes:
+        data = bytes(self._input[:size])
+        del self._input[:size]
+        return data
+
+
+    def reset_input_buffer(self) -> None:
+        self._input.clear()
+
+
+    def reset_output_buffer(self) -> None:
+        pass
+
+
+    def close(self) -> None:
+        self.is_open = False
+
+
+class CSLaserEmulator:
+    """
+    Serves CSLaserDeviceModel on a Linux pseudo-terminal
+    """
+    def __init__(self, config: Optional[EmulatorConfig] = None):
+        self.config = config or EmulatorConfig()
+        self.model = CSLaserDeviceModel(self.config)
+        self.stats = {"bytes_in": 0, "bytes_out": 0, "answers": 0, "dropped": 0, "truncated": 0, "frames": 0}
+        self._master_fd = None
+        self._slave_fd = None
+        self._thread = None
+        self._running = False
+
+
+    @property
+    def port(self) -> Optional[str]:
+        if self._slave_fd is None:
+            return None
+        return os.ttyname(self._slave_fd)
+
+
+    def start(self) -> str:
+        import tty # needs termios, absent on Windows
+        self._master_fd, self._slave_fd = os.openpty()
+        tty.setraw(self._master_fd)
+        tty.setraw(self._slave_fd)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name="CSLaserEmulator", daemon=True)
+        self._thread.start()
+        logging.info(f"CS Laser emulator listening on {self.port}")
+        return self.port
+
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master_fd, self._slave_fd):
+            if fd is not None:
+                os.close(fd)
+        self._master_fd = None
+        self._slave_fd = None
+
+
+    def __enter__(self):
+        self.start()
+        return self
+
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+    def _serve(self) -> None:
+        config = self.config
+        if config.burst:
+            frame_time = config.burst_format.frame_size * BITS_PER_BYTE / config.baudrate
+            period = max(1.0 / config.burst_rate if config.burst_rate > 0 else 0.0, frame_time)
+            next_frame = time.monotonic()
+            os.set_blocking(self._master_fd, False)
+        while self._running:
+            if config.burst:
+                next_frame = self._stream(next_frame, period)
+            readable, _, _ = select.select([self._master_fd], [], [], 0.002 if config.burst else 0.05)
+            if not readable:
+                continue
+            try:
+                request = os.read(self._master_fd, 1024)
+            except OSError:
+                continue
+            self.stats["bytes_in"] += len(request)
+            answer = self.model.feed(request)
+            if answer:
+                self._send(answer)
+
+
+    def _stream(self, next_frame: float, period: float) -> float:
+        """
+        Write the burst frames due by now -> time of the next frame
+        """
+        now = time.monotonic()
+        if now < next_frame:
+            return next_frame
+        count = min(int((now - next_frame) / period) + 1, 4096)
+        frames = []
+        for _ in range(count):
+            frame = self.model.burst_frame()
+            if self.model.random.random() < self.config.truncate_probability:
+                frame = frame[:self.model.random.randrange(1, len(frame))]
+                self.stats["truncated"] += 1
+            frames.append(frame)
+        data = b"".join(frames)
+        try:
+            written = os.write(self._master_fd, data)
+        except (BlockingIOError, OSError):
+            written = 0 # nobody reads: the device does not wait
+        if written < len(data):
+            self.stats["dropped"] += 1
+        self.stats["frames"] += count
+        self.stats["bytes_out"] += written
+        return next_frame + count * period
+
+
+    def _send(self, answer: bytes) -> None:
+        config = self.config
+        rng = self.model.random
+        if rng.random() < config.drop_probability:
+            self.stats["dropped"] += 1
+            return
+        if len(answer) > 1 and rng.random() < config.truncate_probability:
+            answer = answer[:rng.randrange(1, len(answer))]
+            self.stats["truncated"] += 1
+        if config.response_delay > 0:
+            time.sleep(config.response_delay)
+        if config.byte_timing:
+            time.sleep(len(answer) * BITS_PER_BYTE / config.baudrate)
+        os.write(self._master_fd, answer)
+        self.stats["answers"] += 1
+        self.stats["bytes_out"] += len(answer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optris CS Laser pty emulator")
+    parser.add_argument("--baudrate", type=int, default=9600)
+    parser.add_argument("--no-byte-timing", action="store_true")
+    parser.add_argument("--response-delay", type=float, default=0.0, help="sec")
+    parser.add_argument("--drop", type=float, default=0.0, help="probability of a dropped answer")
+    parser.add_argument("--truncate", type=float, default=0.0, help="probability of a truncated answer")
+    parser.add_argument("--noise", type=float, default=0.0, help="°C")
+    parser.add_argument("--waveform", choices=WAVEFORMS.keys(), default="constant")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--burst", action="store_true", help="stream burst frames (see burst_reader.py)")
+    parser.add_argument("--burst-rate", type=float, default=0.0, help="frames/sec, 0: line rate")
+    args = parser.parse_args()
+    config = EmulatorConfig(
+        baudrate=args.baudrate, byte_timing=not args.no_byte_timing, response_delay=args.response_delay,
+        drop_probability=args.drop, truncate_probability=args.truncate, noise=args.noise,
+        target_temperature=WAVEFORMS[args.waveform], seed=args.seed, burst=args.burst, burst_rate=args.burst_rate)
+    with CSLaserEmulator(config) as emulator:
+        print(emulator.port, flush=True)
+        try:
+            while True:
+                time.sleep(1.0)
+        except KeyboardInterrupt:
+            pass
+    logging.info(f"Emulator stats: {emulator.stats}")
+
+
+if __name__ == "__main__":
+    main()
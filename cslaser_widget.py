@@ -2,30 +2,52 @@ from PyQt6.QtWidgets import (
     QGroupBox, QPushButton, QLabel, QVBoxLayout, QHBoxLayout,
     QComboBox, QDoubleSpinBox, QFormLayout, QMessageBox
 )
-from PyQt6.QtCore import pyqtSignal, Qt
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont
-from optris_cslaser_control import OptrisCSLaserControl
+from optris_cslaser_control import OptrisCSLaserControl, CSLaserSnapshot
 from base_polling_thread import BasePollingThread
+from sample_buffer import SampleRingBuffer
+from port_discovery import discover
+from adaptive_polling import AdaptivePoller, AdaptivePollingPolicy
+from live_publisher import LivePublisher
+from rolling_stats import RollingStats
+from replay import ReplaySource
+from interlock import Interlock, TripEvent, laser_off_bound
 import serial.tools.list_ports
 import pyqtgraph as pg
 import numpy as np
+from typing import Optional
 import logging
+import time
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+POLLING_FIELDS = ("target_temperature", "head_temperature")
+DISPLAY_INTERVAL = 100 # msec, GUI refresh independent of the polling rate
+
 
 class CSLaserWidget(QGroupBox):
     """
     Control widget for Optris CS Laser
     """
 
-    def __init__(self, parent=None, polling_interval=0.5):
+    def __init__(self, parent=None, polling_interval=0.5, adaptive_policy: Optional[AdaptivePollingPolicy] = None,
+                 publisher: Optional[LivePublisher] = None, rolling_stats: Optional[RollingStats] = None,
+                 interlock: Optional[Interlock] = None):
         super().__init__(parent)
         self.setTitle("Optris CS Laser Control")
         self.pyro = None
         self.polling_thread = None
         self.polling_interval = polling_interval
-        self._last_temperature = None
+        self.adaptive_policy = adaptive_policy
+        self.publisher = publisher
+        self.rolling_stats = rolling_stats if rolling_stats is not None else RollingStats()
+        self.interlock = interlock
+        self.emissivity = None # last value read from the head
+        self.discovered_ports = {} # port -> serial number
+        self.sample_buffer = SampleRingBuffer(fields=POLLING_FIELDS)
+        self.display_timer = QTimer(self)
+        self.display_timer.timeout.connect(self.update_temperature_display)
 
         # UI elements
         self.scan_port_btn = QPushButton("Scan COM Port")
@@ -56,6 +78,11 @@ class CSLaserWidget(QGroupBox):
         font.setPointSize(36)
         font.setBold(True)
         self.temperature_label.setFont(font)
+        self.stats_label = QLabel("")
+        self.stats_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.interlock_label = QLabel("")
+        self.interlock_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.interlock_label.setStyleSheet("color: red; font-weight: bold")
 
         # layout
         layout = QVBoxLayout()
@@ -70,14 +97,20 @@ class CSLaserWidget(QGroupBox):
         emissivity_input_layout.addWidget(self.emissivity_change_btn)
         layout.addLayout(emissivity_input_layout)
         layout.addWidget(self.temperature_label)
+        layout.addWidget(self.stats_label)
+        layout.addWidget(self.interlock_label)
         self.setLayout(layout)
     
 
     def scan_com_port(self):
         self.ports_combo.clear()
         ports = serial.tools.list_ports.comports()
-        for port in ports:
-            self.ports_combo.addItem(f"{port.description}", port.device)
+        self.discovered_ports = discover([port.device for port in ports])
+        # identified CS Laser heads first
+        for port in sorted(ports, key=lambda port: port.device not in self.discovered_ports):
+            serial_number = self.discovered_ports.get(port.device)
+            label = f"{port.description}" if serial_number is None else f"CS Laser S/N {serial_number} ({port.device})"
+            self.ports_combo.addItem(label, port.device)
     
 
     def toggle_connect(self):
@@ -93,14 +126,16 @@ class CSLaserWidget(QGroupBox):
                 logging.error(f"Failed to create OptrisCSLaserControl instance: {e}")
                 return
             try:
-                self.pyro.connect()
+                # a head which answered the scan does not need the DTR reset
+                self.pyro.connect(dtr_reset=port not in self.discovered_ports)
                 self.scan_port_btn.setEnabled(False)
                 self.ports_combo.setEnabled(False)
                 self.connect_btn.setText("Disconnect")
                 self.laser_btn.setEnabled(True)
                 self.serial_number_label.setText(f"Serial Number: {self.pyro.serial_number}")
-                self.emissivity_label.setText(f"Emissivity: {self.pyro.emissivity:.2f}")
-                self.emissivity_input.setValue(self.pyro.emissivity)
+                self.emissivity = self.pyro.emissivity
+                self.emissivity_label.setText(f"Emissivity: {self.emissivity:.2f}")
+                self.emissivity_input.setValue(self.emissivity)
                 self.emissivity_input.setEnabled(True)
                 self.emissivity_change_btn.setEnabled(True)
                 self.pyro.laser = False # ensure laser to be off
@@ -109,14 +144,24 @@ class CSLaserWidget(QGroupBox):
                 return
             # start polling
             try:
-                self.polling_thread = CSLaserPollingThread(self.pyro, self.polling_interval, parent=self)
-                self.polling_thread.updated.connect(self.update_temperature_display)
+                self.polling_thread = CSLaserPollingThread(
+                    self.pyro, self.polling_interval, self.sample_buffer,
+                    adaptive_policy=self.adaptive_policy, publisher=self.publisher,
+                    rolling_stats=self.rolling_stats, interlock=self.interlock, parent=self)
+                self.polling_thread.command_done.connect(self.on_command_done)
+                self.polling_thread.tripped.connect(self.on_interlock_tripped)
+                if self.interlock is not None:
+                    names = ", ".join(rule.name for rule in self.interlock.rules)
+                    logging.info(f"Interlock armed ({names}), laser-off within "
+                                 f"{laser_off_bound(self.pyro) * 1000:.0f} ms of the tripping answer")
                 self.polling_thread.start()
+                self.display_timer.start(DISPLAY_INTERVAL)
             except Exception as e:
                 logging.error(f"Failed to start polling thread: {e}")
                 return
         else:
             # disconnect
+            self.display_timer.stop()
             if self.polling_thread is not None:
                 self.polling_thread.stop()
                 self.polling_thread = None
@@ -134,49 +179,204 @@ class CSLaserWidget(QGroupBox):
             self.emissivity_change_btn.setEnabled(False)
 
 
-    def toggle_laser(self):
-        if self.polling_thread is not None:
-            self.polling_thread.stop()
-        if self.pyro.laser:
-            # if laser is on -> off
-            self.pyro.laser = False
-        else:
-            # if laser is off -> on
-            self.pyro.laser = True
+    def start_replay(self, source: ReplaySource):
+        """
+        Drive the display (and everything reading sample_buffer) from a ReplaySource
+        instead of a device
+        """
+        self.scan_port_btn.setEnabled(False)
+        self.ports_combo.setEnabled(False)
+        self.connect_btn.setEnabled(False)
+        self.serial_number_label.setText(f"Replay: {source.path.name} (x{source.speed:g})")
+        self.polling_thread = ReplayPollingThread(
+            source, self.sample_buffer, publisher=self.publisher, rolling_stats=self.rolling_stats, parent=self)
         self.polling_thread.start()
+        self.display_timer.start(DISPLAY_INTERVAL)
 
 
-    def change_emissivity(self):
+    def stop_replay(self):
+        self.display_timer.stop()
         if self.polling_thread is not None:
             self.polling_thread.stop()
-        self.pyro.emissivity = self.emissivity_input.value()
-        self.polling_thread.start()
+            self.polling_thread = None
 
 
-    def update_emissivity_display(self):
-        if self.polling_thread is not None:
-            self.polling_thread.stop()
-        emissivity = self.pyro.emissivity
-        self.polling_thread.start()
+    def toggle_laser(self):
+        # served by the polling thread between two polls
+        self.laser_btn.setEnabled(False)
+        self.polling_thread.submit("laser", self._toggle_laser)
+
+
+    def _toggle_laser(self) -> bool:
+        """
+        runs on the polling thread
+        """
+        state = not self.pyro.laser
+        if state and self.interlock is not None and self.interlock.inhibits_laser:
+            logging.warning(f"Laser stays off, interlock tripped: {', '.join(self.interlock.tripped)}")
+            return False
+        self.pyro.laser = state
+        return state
+
+
+    def change_emissivity(self):
+        self.emissivity_change_btn.setEnabled(False)
+        self.polling_thread.submit("emissivity", self._set_emissivity, self.emissivity_input.value())
+
+
+    def _set_emissivity(self, emissivity: float) -> Optional[float]:
+        """
+        runs on the polling thread
+        """
+        self.pyro.emissivity = emissivity
+        return self.pyro.emissivity
+
+
+    def on_command_done(self, name: str, result) -> None:
+        if name == "laser":
+            self.laser_btn.setEnabled(True)
+        elif name == "emissivity":
+            self.emissivity_change_btn.setEnabled(True)
+            if result is not None:
+                self.update_emissivity_display(result)
+
+
+    def metadata(self) -> dict:
+        """
+        {port: {port, serial_number, emissivity}} of the connected head, without touching the port
+        """
+        if self.pyro is None:
+            return {}
+        return {self.pyro.port: {"port": self.pyro.port, "serial_number": self.pyro.cached("serial_number"),
+                                 "emissivity": self.emissivity}}
+
+
+    def on_interlock_tripped(self, event: TripEvent) -> None:
+        # only displays the trip, the laser was already switched off on the polling thread
+        latency = f", laser off after {event.trip_latency * 1000:.0f} ms" if event.trip_latency is not None else ""
+        failed = " (laser-off NOT acknowledged)" if event.action_ok is False else ""
+        self.interlock_label.setText(
+            f"Interlock {event.rule}: {event.value:.1f} > {event.limit:g}{latency}{failed}")
+
+
+    def update_emissivity_display(self, emissivity: Optional[float] = None):
+        if emissivity is None:
+            emissivity = self.pyro.cached("emissivity")
+        if emissivity is None:
+            # cache expired: read it on the polling thread, display on command_done
+            self.polling_thread.submit("emissivity", lambda: self.pyro.emissivity)
+            return
+        self.emissivity = emissivity
         self.emissivity_label.setText(f"Current Emissivity: {emissivity:.2f}")
         self.emissivity_input.setValue(emissivity)
 
 
-    def update_temperature_display(self, temperature: float):
-        self.temperature_label.setText(f"{temperature:.1f}°C")
-        self._last_temperature = temperature
+    def update_temperature_display(self):
+        temperature = self.latest_temperature
+        if temperature is not None:
+            self.temperature_label.setText(f"{temperature:.1f}°C")
+        self.update_stats_display()
+
+
+    def update_stats_display(self):
+        if not self.rolling_stats.windows:
+            return
+        window = next(iter(self.rolling_stats.windows))
+        prefix = f"{self.rolling_stats.field}_{window}"
+        stats = self.rolling_stats.latest
+        if stats[f"{prefix}_mean"] is None:
+            return
+        slope = stats[f"{prefix}_slope"]
+        slope_text = f"{slope * 60:+.2f}°C/min" if slope is not None else "---"
+        self.stats_label.setText(
+            f"{window}: {stats[f'{prefix}_mean']:.1f} ± {stats[f'{prefix}_std']:.2f}°C, {slope_text}")
     
 
     @property
-    def latest_temperature(self) -> float:
-        return self._last_temperature
+    def latest_temperature(self) -> Optional[float]:
+        latest = self.sample_buffer.latest(1)
+        if len(latest) == 0 or np.isnan(latest["target_temperature"][0]):
+            return None
+        return float(latest["target_temperature"][0])
 
 class CSLaserPollingThread(BasePollingThread):
-    updated = pyqtSignal(float)
+    """
+    Polls a snapshot of fields and writes it into the shared SampleRingBuffer;
+    consumers read the buffer in bulk instead of receiving one signal per sample.
+    With adaptive_policy the interval follows the rate of change of the target
+    temperature and only samples outside the deadband (or heartbeats) are stored.
+    Stored samples are also handed to publisher (LivePublisher) and rolling_stats (RollingStats) if given.
+    interlock (Interlock) checks every polled sample before anything else and acts on
+    this thread; tripped is emitted afterwards for display only.
+    """
+    tripped = pyqtSignal(object) # TripEvent
+
+    def __init__(self, controller, interval: float, sample_buffer: SampleRingBuffer, fields=None,
+                 adaptive_policy: Optional[AdaptivePollingPolicy] = None, publisher: Optional[LivePublisher] = None,
+                 rolling_stats: Optional[RollingStats] = None, interlock: Optional[Interlock] = None, parent=None):
+        super().__init__(controller, interval, parent)
+        self.sample_buffer = sample_buffer
+        self.interlock = interlock
+        self.publisher = publisher
+        self.rolling_stats = rolling_stats
+        self.fields = tuple(fields) if fields is not None else sample_buffer.fields
+        if interlock is not None:
+            unpolled = [rule.field for rule in interlock.rules if rule.field not in self.fields]
+            if unpolled:
+                raise ValueError(f"Interlock fields not polled: {unpolled}")
+        self.adaptive = AdaptivePoller(adaptive_policy) if adaptive_policy is not None else None
+        if self.adaptive is not None:
+            self.interval = self.adaptive.interval
 
-    def get_data(self) -> float:
-        return self.controller.target_temperature
+
+    def get_data(self) -> Optional[CSLaserSnapshot]:
+        snapshot = self.controller.read_snapshot(self.fields)
+        if self.interlock is not None:
+            for event in self.interlock.check(snapshot, self.controller):
+                self.tripped.emit(event)
+        if self.adaptive is None:
+            return snapshot
+        temperature = snapshot.target_temperature if snapshot is not None else None
+        report, self.interval = self.adaptive.update(time.monotonic(), temperature)
+        return snapshot if report else None
     
 
-    def emit_data(self, data:float) -> None:
-        self.updated.emit(data)
+    def emit_data(self, data: CSLaserSnapshot) -> None:
+        # stamped by the driver when the answer arrived
+        timestamp = data.timestamp if data.timestamp is not None else time.time()
+        self.sample_buffer.append_snapshot(timestamp, data)
+        if self.publisher is not None:
+            self.publisher.publish_snapshot(timestamp, data)
+        if self.rolling_stats is not None:
+            self.rolling_stats.update(timestamp, getattr(data, self.rolling_stats.field, None))
+
+
+class ReplayPollingThread(CSLaserPollingThread):
+    """
+    Stand-in for CSLaserPollingThread which emits the samples of a ReplaySource
+    (recorded timing / speed) into the same sample buffer, publisher and statistics
+    """
+    def __init__(self, source: ReplaySource, sample_buffer: SampleRingBuffer, fields=None,
+                 publisher: Optional[LivePublisher] = None, rolling_stats: Optional[RollingStats] = None, parent=None):
+        super().__init__(source, 1.0, sample_buffer, fields=fields, publisher=publisher,
+                         rolling_stats=rolling_stats, parent=parent)
+
+
+    def run(self):
+        source = self.controller
+        for snapshot in source:
+            if not self._running:
+                break
+            try:
+                self.emit_data(snapshot)
+            except Exception as e:
+                logging.error(f"{self.__class__.__name__} replay failed: {e}")
+        stats = source.stats
+        logging.info(
+            f"{self.__class__.__name__} stopped: {stats.samples} samples at {stats.rate:.0f} samples/sec, "
+            f"max lag {stats.max_lag * 1000:.1f} ms")
+
+
+    def stop(self):
+        self.controller.stop()
+        super().stop()
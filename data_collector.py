@@ -1,12 +1,131 @@
 from datetime import datetime
+import math
+from typing import Optional
+
+
+def format_timestamp(time_ns: int) -> str:
+    """
+    unix ns -> ISO format with µs (the resolution of datetime)
+    """
+    return datetime.fromtimestamp(time_ns / 1e9).isoformat(sep=" ", timespec="microseconds")
 
 
 class DataCollector:
+    """
+    Collects samples of a CSLaserWidget with the time they were read by the polling
+    thread, plus its rolling statistics (as of the newest sample)
+    """
     def __init__(self, pyrometer_widget):
         self.pyrometer_widget = pyrometer_widget
+        self._next_index = pyrometer_widget.sample_buffer.total_written
+
+
+    @property
+    def plot_keys(self) -> list:
+        rolling_stats = self.pyrometer_widget.rolling_stats
+        return ["temperature"] + [f"{rolling_stats.field}_{ewma.name}" for ewma in rolling_stats.ewmas]
+
+
+    @property
+    def columns(self) -> list:
+        return ["temperature", "timestamp_ns", "monotonic_ns", "latency"] + self.pyrometer_widget.rolling_stats.columns
+
+
+    @staticmethod
+    def _row(sample) -> dict:
+        temperature = float(sample["target_temperature"])
+        latency = float(sample["latency"])
+        return {
+            "timestamp": format_timestamp(int(sample["time_ns"])),
+            "temperature": None if math.isnan(temperature) else temperature,
+            "timestamp_ns": int(sample["time_ns"]),
+            "monotonic_ns": int(sample["monotonic_ns"]) or None,
+            "latency": None if math.isnan(latency) else latency,
+        }
+
+
+    def collect_data(self) -> Optional[dict]:
+        """
+        Newest sample -> row, None before the first sample
+        """
+        latest = self.pyrometer_widget.sample_buffer.latest(1)
+        if len(latest) == 0:
+            return None
+        data_dict = self._row(latest[0])
+        data_dict.update(self.pyrometer_widget.rolling_stats.latest)
+        return data_dict
+
+
+    def collect_rows(self) -> list:
+        """
+        Every sample polled since the previous call -> rows in time order
+        """
+        rolling_stats = self.pyrometer_widget.rolling_stats
+        samples, self._next_index = self.pyrometer_widget.sample_buffer.since(self._next_index)
+        rows = []
+        for sample in samples:
+            data_dict = self._row(sample)
+            data_dict.update(dict.fromkeys(rolling_stats.columns)) # same columns in every row
+            rows.append(data_dict)
+        if rows:
+            rows[-1].update(rolling_stats.latest)
+        return rows
+
+
+    def metadata(self) -> dict:
+        return self.pyrometer_widget.metadata()
+
+
+    def start(self) -> None:
+        """
+        Start collecting at the newest sample (skip what was polled before recording)
+        """
+        self._next_index = max(self.pyrometer_widget.sample_buffer.total_written - 1, 0)
+
+
+class FrameDataCollector:
+    """
+    Collects the time-aligned frames of an AcquisitionManager, with the arrival
+    time (unix ns) and latency of every device's answer
+    """
+    def __init__(self, acquisition_manager):
+        self.acquisition_manager = acquisition_manager
+        self._next_index = acquisition_manager.frame_count
+
+
+    @property
+    def plot_keys(self) -> list:
+        return [f"{label}_target_temperature" for label in self.acquisition_manager.labels]
+
+
+    @property
+    def columns(self) -> list:
+        manager = self.acquisition_manager
+        # per-device time_ns only goes to CSV: binary columns are float32
+        return [f"{label}_{field}" for label in manager.labels for field in manager.fields + ("latency",)]
+
+
+    def collect_data(self) -> Optional[dict]:
+        frame = self.acquisition_manager.latest_frame
+        if frame is None:
+            return None
+        return frame.to_dict()
+
+
+    def collect_rows(self) -> list:
+        """
+        Every frame polled since the previous call -> rows in time order
+        """
+        frames, self._next_index = self.acquisition_manager.frames_since(self._next_index)
+        return [frame.to_dict() for frame in frames]
+
+
+    def metadata(self) -> dict:
+        return self.acquisition_manager.metadata()
 
 
-    def collect_data(self) -> dict:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        temperature = self.pyrometer_widget.last_temperature
-        return {"timestamp": timestamp, "temperature": temperature}
\ No newline at end of file
+    def start(self) -> None:
+        """
+        Start collecting at the newest frame (skip what was polled before recording)
+        """
+        self._next_index = max(self.acquisition_manager.frame_count - 1, 0)
@@ -1,13 +1,198 @@
 import csv
 from dataclasses import asdict, dataclass
+from datetime import datetime
+import gzip
+import io
+import logging
 import os
 from pathlib import Path
+import queue
+import re
+import struct
+import threading
+import time
+try:
+    import zstandard
+except ImportError: # optional, only needed for compression="zstd"
+    zstandard = None
 
 ENCODING = "utf-8"
+FLUSH_ROWS = 100 # rows
+FLUSH_INTERVAL = 1.0 # sec
+INDEX_STRIDE = 256 # rows between two entries of the sparse time index
+INDEX_ENTRY = struct.Struct("<qq") # (timestamp ns, byte offset of the row)
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+_CLOSE = object()
+
+
+def default_filename() -> str:
+    now = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{now}_pyrometer"
+
+
+def to_ns(timestamp) -> int:
+    """
+    str (ISO format) / datetime / float (unix sec) / int (unix ns) -> unix ns
+    """
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if isinstance(timestamp, datetime):
+        return int(timestamp.timestamp() * 1_000_000) * 1000
+    if isinstance(timestamp, float):
+        # float64 unix time only carries ~µs resolution
+        return round(timestamp * 1_000_000) * 1000
+    return int(timestamp)
+
+
+def segment_path(csv_path, number: int, compression=None) -> Path:
+    """
+    <stem>_0001.csv[.gz|.zst] next to csv_path
+    """
+    csv_path = Path(csv_path)
+    return csv_path.with_name(f"{csv_path.stem}_{number:04d}{csv_path.suffix}{COMPRESSION_SUFFIXES[compression]}")
+
+
+def list_segments(csv_path) -> list:
+    """
+    Files written by DataLogger for csv_path in recording order:
+    the plain / compressed file itself, or its numbered segments
+    """
+    csv_path = Path(csv_path)
+    pattern = re.compile(re.escape(csv_path.stem) + r"_(\d{4,})" + re.escape(csv_path.suffix) + r"(\.gz|\.zst)?$")
+    numbered = []
+    for path in csv_path.parent.glob(f"{csv_path.stem}_*"):
+        match = pattern.match(path.name)
+        if match:
+            numbered.append((int(match.group(1)), path))
+    if numbered:
+        return [path for _, path in sorted(numbered)]
+    for suffix in COMPRESSION_SUFFIXES.values():
+        path = Path(f"{csv_path}{suffix}")
+        if path.exists():
+            return [path]
+    return []
+
+
+def open_segment(path, mode: str = "rb"):
+    """
+    Binary stream of a (possibly compressed) segment
+    """
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, mode)
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise ImportError("zstandard is required to read .zst recordings")
+        return zstandard.open(path, mode)
+    return open(path, mode)
+
+
+def index_path(csv_path) -> Path:
+    """
+    Sidecar file of the sparse time index: <csv_path>.idx
+    """
+    return Path(f"{csv_path}.idx")
+
+
+class _Segment:
+    """
+    One open output file of DataLogger (row formatting, compression and time index)
+    """
+    def __init__(self, path: Path, fieldnames, compression=None, index: bool = True):
+        self.path = path
+        self.started = time.monotonic()
+        self.bytes = 0 # uncompressed
+        self.rows = 0
+        write_header = not path.exists() or path.stat().st_size == 0
+        self._raw = open(path, "ab")
+        if compression == "gzip":
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode="ab")
+        elif compression == "zstd":
+            self._stream = zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._stream = self._raw
+        # seekable offsets only exist for plain files -> index only those
+        self._index = open(index_path(path), "ab") if index and compression is None else None
+        self._line = io.StringIO()
+        self._writer = csv.DictWriter(self._line, fieldnames=fieldnames)
+        if write_header:
+            self._writer.writeheader()
+            self._write_line()
+        self.bytes = self._raw.tell() if compression is None else self.bytes
+
+
+    def _write_line(self) -> None:
+        data = self._line.getvalue().encode(ENCODING)
+        self._line.seek(0)
+        self._line.truncate()
+        self._stream.write(data)
+        self.bytes += len(data)
+
+
+    def write(self, data_dict: dict) -> None:
+        if self._index is not None and self.rows % INDEX_STRIDE == 0:
+            self._index.write(INDEX_ENTRY.pack(to_ns(data_dict["timestamp"]), self.bytes))
+        self._writer.writerow(data_dict)
+        self._write_line()
+        self.rows += 1
+
+
+    def flush(self, fsync: bool = False) -> None:
+        self._stream.flush()
+        if self._stream is not self._raw:
+            self._raw.flush()
+        if self._index is not None:
+            self._index.flush()
+        if fsync:
+            os.fsync(self._raw.fileno())
+
+
+    def close(self, fsync: bool = False) -> None:
+        self.flush(fsync)
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.close()
+        if self._index is not None:
+            self._index.close()
+
 
 class DataLogger:
-    def __init__(self, csv_path):
+    """
+    CSV logger with a background writer thread.
+    write_csv() only queues the row; the writer keeps the file open and flushes
+    every flush_rows rows or every flush_interval sec, whichever comes first
+    (with fsync=True each flush is also forced to disk).
+    On a crash of this process at most the rows since the last flush are lost;
+    without fsync an OS crash / power loss can lose what the OS had not written yet.
+    While writing, every INDEX_STRIDE-th row's timestamp and byte offset is appended
+    to a sidecar index (see index_path() and log_reader.CSVLogReader).
+
+    compression: None, "gzip" or "zstd" (needs the zstandard package), streamed while recording
+    rotate_bytes / rotate_seconds: start a new numbered segment (see segment_path())
+    after this many uncompressed bytes / sec; each segment has its own header.
+    Without rotation the output is csv_path (+ .gz / .zst).
+    """
+    def __init__(self, csv_path, flush_rows: int = FLUSH_ROWS, flush_interval: float = FLUSH_INTERVAL, fsync: bool = False,
+                 compression=None, rotate_bytes=None, rotate_seconds=None):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstandard is required for compression='zstd'")
         self._csv_path = csv_path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.compression = compression
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self._segment_number = len(list_segments(csv_path)) if self.rotates else 0
+        self._path = self._next_path()
+        self._queue = queue.SimpleQueue()
+        self._error = None # exception which stopped the writer thread
+        self._thread = threading.Thread(target=self._run, name="DataLogger", daemon=True)
+        self._thread.start()
 
 
     @property
@@ -15,15 +200,102 @@ class DataLogger:
         return self._csv_path
 
 
+    @property
+    def path(self) -> Path:
+        """
+        File currently written to
+        """
+        return self._path
+
+
+    @property
+    def rotates(self) -> bool:
+        return self.rotate_bytes is not None or self.rotate_seconds is not None
+
+
+    def _next_path(self) -> Path:
+        if not self.rotates:
+            return Path(f"{self._csv_path}{COMPRESSION_SUFFIXES[self.compression]}")
+        self._segment_number += 1
+        return segment_path(self._csv_path, self._segment_number, self.compression)
+
+
+    def _should_rotate(self, segment: _Segment) -> bool:
+        if segment.rows == 0:
+            return False
+        if self.rotate_bytes is not None and segment.bytes >= self.rotate_bytes:
+            return True
+        return self.rotate_seconds is not None and time.monotonic() - segment.started >= self.rotate_seconds
+
+
     def write_csv(self, data_object) -> None:
-        data_dict = data_object.to_dict()
-        # write header if file not existing
-        if not os.path.exists(self._csv_path):
-            with open(self._csv_path, "w", newline="", encoding=ENCODING) as f_csv:
-                writer = csv.DictWriter(f_csv, fieldnames=data_dict.keys())
-                writer.writeheader()
-        # add data (create csv file if not existing)
-        with open(self._csv_path, "a", newline="", encoding=ENCODING) as f_csv:
-            writer = csv.DictWriter(f_csv, fieldnames=data_dict.keys())
-            writer.writerow(data_dict)
+        """
+        Queue a row; raises RuntimeError once the writer thread has stopped,
+        so rows are not piled up in memory for nobody
+        """
+        if not self._thread.is_alive():
+            self._raise_error()
+            raise RuntimeError(f"DataLogger of {self._path} is closed")
+        data_dict = data_object if isinstance(data_object, dict) else data_object.to_dict()
+        self._queue.put(data_dict)
+
+
+    write = write_csv # common interface with BinaryLogger
+
+
+    def close(self) -> None:
+        """
+        Write all queued rows, flush and close the file
+        """
+        if self._thread.is_alive():
+            self._queue.put(_CLOSE)
+            self._thread.join()
+        self._raise_error()
+
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"DataLogger failed to write {self._path}: {self._error}") from self._error
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
 
+    def _run(self) -> None:
+        segment = None
+        pending = 0
+        last_flush = time.monotonic()
+        try:
+            while True:
+                timeout = max(self.flush_interval - (time.monotonic() - last_flush), 0.0)
+                try:
+                    data_dict = self._queue.get(timeout=timeout if pending else None)
+                except queue.Empty:
+                    data_dict = None
+                if data_dict is _CLOSE:
+                    break
+                if data_dict is not None:
+                    if segment is not None and self.rotates and self._should_rotate(segment):
+                        segment.close(self.fsync)
+                        segment = None
+                        self._path = self._next_path()
+                        pending = 0
+                    if segment is None:
+                        segment = _Segment(self._path, list(data_dict.keys()), self.compression, index="timestamp" in data_dict)
+                    segment.write(data_dict)
+                    pending += 1
+                if pending and (pending >= self.flush_rows or time.monotonic() - last_flush >= self.flush_interval):
+                    segment.flush(self.fsync)
+                    pending = 0
+                    last_flush = time.monotonic()
+        except Exception as e:
+            self._error = e
+            logging.error(f"DataLogger failed to write {self._path}: {e}")
+        finally:
+            if segment is not None:
+                segment.close(self.fsync)
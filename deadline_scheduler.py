@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+import math
+import time
+
+CATCH_UP = "catch_up" # after an overrun, poll back-to-back until the missed deadlines are served
+SKIP = "skip" # after an overrun, drop the missed deadlines and stay on the original grid
+POLICIES = (CATCH_UP, SKIP)
+
+SPIN_THRESHOLD = 0.002 # sec, busy-wait the last part of a wait (coarse OS sleep granularity)
+
+
+@dataclass
+class PollingStats:
+    ticks: int = 0
+    overruns: int = 0 # polls which ended after the next deadline
+    skipped: int = 0 # deadlines dropped by the SKIP policy
+    achieved_rate: float = 0.0 # Hz, over the whole run
+    mean_period: float = 0.0 # sec
+    period_jitter: float = 0.0 # sec, standard deviation of the period
+    max_lateness: float = 0.0 # sec, worst start time behind its deadline
+
+
+class DeadlineScheduler:
+    """
+    Fixed-rate scheduler on absolute monotonic deadlines (time.perf_counter: on Windows
+    time.monotonic ticks every ~15.6 ms, too coarse for the spin-wait and jitter statistics)
+    deadline[n] = start + n * interval, so I/O time does not add up to drift.
+    """
+    def __init__(self, interval: float, policy: str = SKIP, clock=time.perf_counter):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+        self._interval = interval
+        self.policy = policy
+        self.clock = clock
+        self.reset()
+
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+
+    @interval.setter
+    def interval(self, interval: float) -> None:
+        # takes effect at the next advance(): the pending deadline is kept
+        self._interval = interval
+
+
+    def reset(self) -> None:
+        now = self.clock()
+        self._start = now
+        self._next_deadline = now
+        self._last_tick = None
+        self._ticks = 0
+        self._overruns = 0
+        self._skipped = 0
+        self._period_mean = 0.0
+        self._period_m2 = 0.0
+        self._max_lateness = 0.0
+
+
+    def time_to_deadline(self) -> float:
+        return self._next_deadline - self.clock()
+
+
+    def wait(self, sleep=time.sleep) -> None:
+        """
+        Block until the next deadline. Coarse sleep first, then spin.
+        """
+        remaining = self.time_to_deadline()
+        if remaining > SPIN_THRESHOLD:
+            sleep(remaining - SPIN_THRESHOLD)
+        while self.clock() < self._next_deadline:
+            pass
+
+
+    def tick(self) -> None:
+        """
+        Call at the start of every poll
+        """
+        now = self.clock()
+        self._max_lateness = max(self._max_lateness, now - self._next_deadline)
+        if self._last_tick is not None:
+            # Welford's online mean / variance of the period
+            period = now - self._last_tick
+            n = self._ticks
+            delta = period - self._period_mean
+            self._period_mean += delta / n
+            self._period_m2 += delta * (period - self._period_mean)
+        self._last_tick = now
+        self._ticks += 1
+
+
+    def advance(self) -> None:
+        """
+        Call at the end of every poll: move to the next deadline
+        """
+        self._next_deadline += self._interval
+        now = self.clock()
+        if now <= self._next_deadline:
+            return
+        self._overruns += 1
+        if self.policy == SKIP:
+            missed = math.ceil((now - self._next_deadline) / self._interval)
+            self._next_deadline += missed * self._interval
+            self._skipped += missed
+
+
+    @property
+    def stats(self) -> PollingStats:
+        elapsed = (self._last_tick - self._start) if self._last_tick is not None else 0.0
+        periods = self._ticks - 1
+        return PollingStats(
+            ticks=self._ticks,
+            overruns=self._overruns,
+            skipped=self._skipped,
+            achieved_rate=periods / elapsed if elapsed > 0 else 0.0,
+            mean_period=self._period_mean,
+            period_jitter=math.sqrt(self._period_m2 / periods) if periods > 1 else 0.0,
+            max_lateness=self._max_lateness,
+        )
@@ -0,0 +1,83 @@
+import numpy as np
+
+DEFAULT_CAPACITY = 1 << 18 # buckets per series
+
+
+class DecimatedSeries:
+    """
+    Constant-memory time series for charts.
+    Every entry is a bucket (x, y_min, y_max); a new sample is a bucket of its own.
+    When the storage is full, neighbouring buckets are merged pairwise (min of mins,
+    max of maxes), so memory stays fixed while old data gets coarser and the
+    extremes of the whole run are kept.
+    """
+    def __init__(self, keys, capacity: int = DEFAULT_CAPACITY):
+        self.keys = list(keys)
+        self.capacity = capacity - capacity % 2
+        self.x = np.empty(self.capacity, dtype="f8")
+        self.y_min = {key: np.empty(self.capacity, dtype="f4") for key in self.keys}
+        self.y_max = {key: np.empty(self.capacity, dtype="f4") for key in self.keys}
+        self.n = 0
+
+
+    def __len__(self) -> int:
+        return self.n
+
+
+    def append(self, x: float, values: dict) -> None:
+        if self.n == self.capacity:
+            self._compact()
+        self.x[self.n] = x
+        for key in self.keys:
+            value = values.get(key)
+            value = np.nan if value is None else value
+            self.y_min[key][self.n] = value
+            self.y_max[key][self.n] = value
+        self.n += 1
+
+
+    def _compact(self) -> None:
+        half = self.n // 2
+        self.x[:half] = self.x[:self.n:2]
+        for key in self.keys:
+            self.y_min[key][:half] = np.fmin(self.y_min[key][:self.n:2], self.y_min[key][1:self.n:2])
+            self.y_max[key][:half] = np.fmax(self.y_max[key][:self.n:2], self.y_max[key][1:self.n:2])
+        self.n = half
+
+
+    def x_range(self):
+        if self.n == 0:
+            return None
+        return self.x[0], self.x[self.n - 1]
+
+
+    def render(self, x_start: float, x_end: float, pixels: int):
+        """
+        Points to draw for the visible range [x_start, x_end] on a plot pixels wide
+        -> (x, {key: y}); at most ~2 points (min, max) per pixel column.
+        """
+        x = self.x[:self.n]
+        # one bucket of margin on both sides so lines run to the plot edges
+        i = max(np.searchsorted(x, x_start, side="left") - 1, 0)
+        j = min(np.searchsorted(x, x_end, side="right") + 1, self.n)
+        count = j - i
+        bins = max(int(pixels), 1)
+        per_bin = -(-count // bins) # ceil
+        if per_bin <= 1:
+            # few enough buckets: draw min and max of each bucket
+            x_out = np.repeat(x[i:j], 2)
+            ys = {key: np.column_stack((self.y_min[key][i:j], self.y_max[key][i:j])).ravel() for key in self.keys}
+            return x_out, ys
+        bins = -(-count // per_bin)
+        pad = bins * per_bin - count
+        x_out = np.repeat(x[i:j:per_bin], 2)
+        ys = {}
+        for key in self.keys:
+            y_min = np.concatenate((self.y_min[key][i:j], np.full(pad, np.nan, dtype="f4"))).reshape(bins, per_bin)
+            y_max = np.concatenate((self.y_max[key][i:j], np.full(pad, np.nan, dtype="f4"))).reshape(bins, per_bin)
+            with np.errstate(all="ignore"):
+                # all-NaN bins (device not answering) stay NaN -> gap in the line
+                bin_min = np.fmin.reduce(y_min, axis=1)
+                bin_max = np.fmax.reduce(y_max, axis=1)
+            ys[key] = np.column_stack((bin_min, bin_max)).ravel()
+        return x_out, ys
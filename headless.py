@@ -0,0 +1,316 @@
+"""
+Headless acquisition without Qt / pyqtgraph
+
+Example)
+    python headless.py --port COM3 --interval 0.1 --fields target_temperature head_temperature --output run.csv
+    python headless.py --port COM3 COM4 --format obr --duration 3600
+"""
+import argparse
+import logging
+from pathlib import Path
+import signal
+import sys
+import time
+from typing import Optional
+from optris_cslaser_control import OptrisCSLaserControl, BAUDRATE, REGISTERS, SNAPSHOT_FIELDS
+from acquisition_manager import AcquisitionManager
+from binary_logger import BinaryLogger
+from data_logger import DataLogger, default_filename
+from data_collector import format_timestamp
+from deadline_scheduler import DeadlineScheduler, POLICIES, SKIP
+from protocol_stats import serve_metrics
+from adaptive_polling import AdaptivePoller, AdaptivePollingPolicy
+from live_publisher import LivePublisher, DROP_POLICIES, DROP_OLDEST
+from rolling_stats import RollingStats
+from burst_reader import BurstFormat, BurstReader, BURST_FIELDS
+from sample_buffer import SampleRingBuffer
+from interlock import Interlock, LimitRule, RateRule, ACTIONS, LASER_OFF, laser_off_bound
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class HeadlessAcquisition:
+    """
+    Polls one or more heads on a deadline grid and writes every sample to a logger
+    With burst (BurstFormat) a single head streaming in burst mode is read instead of polled.
+    interlock_rules are checked on every polled sample of every head (one Interlock per head).
+    """
+    def __init__(self, ports, interval: float, fields=SNAPSHOT_FIELDS, policy: str = SKIP,
+                 adaptive_policy: Optional[AdaptivePollingPolicy] = None, windows=(), ewma=(),
+                 burst: Optional[BurstFormat] = None, baudrate: int = BAUDRATE, interlock_rules=()):
+        self.burst = burst
+        if burst is not None:
+            if len(ports) != 1 or adaptive_policy is not None:
+                raise ValueError("Burst mode needs a single port and no adaptive polling")
+            if interlock_rules:
+                # the echo of 90 00 would be mixed into the frame stream
+                raise ValueError("The interlock needs polling, not burst mode")
+            fields = burst.fields
+        self.fields = tuple(fields)
+        self.scheduler = DeadlineScheduler(interval, policy)
+        self.adaptive = AdaptivePoller(adaptive_policy) if adaptive_policy is not None else None
+        if self.adaptive is not None:
+            if len(ports) != 1 or "target_temperature" not in self.fields:
+                raise ValueError("Adaptive polling needs a single port and the target_temperature field")
+            self.scheduler.interval = self.adaptive.interval
+        self._running = False
+        if len(ports) == 1:
+            self.controller = OptrisCSLaserControl(ports[0], baudrate=baudrate)
+            self.manager = None
+        else:
+            self.controller = None
+            self.manager = AcquisitionManager(ports, fields=self.fields, baudrate=baudrate)
+        # rolling statistics of every target temperature column
+        self.rolling_stats = []
+        if windows or ewma:
+            if "target_temperature" not in self.fields:
+                raise ValueError("Rolling statistics need the target_temperature field")
+            labels = [f"{label}_" for label in self.manager.labels] if self.manager is not None else [""]
+            self.rolling_stats = [RollingStats(f"{label}target_temperature", windows, ewma) for label in labels]
+        unpolled = [rule.field for rule in interlock_rules if rule.field not in self.fields]
+        if unpolled:
+            raise ValueError(f"Interlock fields not polled: {unpolled}")
+        self.interlocks = {label: Interlock(interlock_rules) for label in self.controllers} if interlock_rules else {}
+
+
+    @property
+    def sample_columns(self) -> list:
+        if self.manager is not None:
+            # per-device arrival time ({label}_time_ns) is in the CSV rows, binary columns are float32
+            return [f"{label}_{field}" for label in self.manager.labels for field in self.fields + ("latency",)]
+        if self.burst is not None:
+            return list(self.fields)
+        return list(self.fields) + ["latency"]
+
+
+    @property
+    def columns(self) -> list:
+        return self.sample_columns + [column for stats in self.rolling_stats for column in stats.columns]
+
+
+    def connect(self) -> None:
+        if self.manager is not None:
+            self.manager.connect()
+        else:
+            self.controller.connect()
+
+
+    def disconnect(self) -> None:
+        if self.manager is not None:
+            self.manager.disconnect()
+        else:
+            self.controller.disconnect()
+
+
+    @property
+    def controllers(self) -> dict:
+        if self.manager is not None:
+            return self.manager.controllers
+        return {self.controller.port: self.controller}
+
+
+    def metadata(self) -> dict:
+        if self.burst is not None:
+            # the port is streaming, it cannot answer register reads
+            return {self.controller.port: {"port": self.controller.port, "burst_sync": self.burst.sync.hex()}}
+        controllers = self.controllers
+        return {
+            label: {"port": controller.port, "serial_number": controller.serial_number, "emissivity": controller.emissivity}
+            for label, controller in controllers.items()
+        }
+
+
+    def sample(self):
+        if self.manager is not None:
+            frame = self.manager.poll()
+            for label, interlock in self.interlocks.items():
+                interlock.check(frame.samples.get(label), self.manager.controllers[label])
+            return frame
+        snapshot = self.controller.read_snapshot(self.fields)
+        if self.interlocks:
+            self.interlocks[self.controller.port].check(snapshot, self.controller)
+        if snapshot is None:
+            return None
+        # stamped by the driver when the answer arrived
+        data_dict = {
+            "timestamp": format_timestamp(snapshot.time_ns),
+            "timestamp_ns": snapshot.time_ns,
+            "latency": snapshot.latency,
+        }
+        data_dict.update({field: getattr(snapshot, field) for field in self.fields})
+        return data_dict
+
+
+    def run(self, logger, duration=None, publisher: Optional[LivePublisher] = None) -> None:
+        self._running = True
+        self.scheduler.reset()
+        end = time.monotonic() + duration if duration is not None else None
+        while self._running and (end is None or time.monotonic() < end):
+            self.scheduler.wait()
+            self.scheduler.tick()
+            try:
+                data = self.sample()
+                if data is not None and self.adaptive is not None:
+                    report, self.scheduler.interval = self.adaptive.update(time.monotonic(), data["target_temperature"])
+                    if not report:
+                        data = None
+                if data is not None:
+                    self.write(data if isinstance(data, dict) else data.to_dict(), logger, publisher)
+            except Exception as e:
+                logging.error(f"Headless polling failed: {e}")
+            self.scheduler.advance()
+
+
+    def write(self, data: dict, logger, publisher: Optional[LivePublisher] = None) -> None:
+        timestamp = data["timestamp_ns"] / 1e9 if "timestamp_ns" in data else time.time()
+        for stats in self.rolling_stats:
+            # each device at the arrival of its own answer ({label}_time_ns in frames)
+            time_ns = data.get(stats.field.replace("target_temperature", "time_ns"))
+            data.update(stats.update(time_ns / 1e9 if time_ns is not None else timestamp, data[stats.field]))
+        try:
+            logger.write(data)
+        except RuntimeError:
+            # the logger's writer thread died, nothing more can be recorded
+            self._running = False
+            raise
+        if publisher is not None:
+            publisher.publish(timestamp, data)
+
+
+    def run_burst(self, logger, duration=None, publisher: Optional[LivePublisher] = None) -> None:
+        """
+        Read the burst stream on a BurstReader thread, write what arrived every interval
+        """
+        sample_buffer = SampleRingBuffer(fields=self.fields)
+        reader = BurstReader(self.controller, sample_buffer, self.burst)
+        # whole blocks go straight into a binary recording unless rows are needed downstream
+        per_row = not isinstance(logger, BinaryLogger) or self.rolling_stats or publisher is not None
+        index = 0
+        self._running = True
+        self.scheduler.reset()
+        reader.start()
+        end = time.monotonic() + duration if duration is not None else None
+        try:
+            while self._running and (end is None or time.monotonic() < end):
+                self.scheduler.wait()
+                self.scheduler.tick()
+                samples, index = sample_buffer.since(index)
+                if not per_row:
+                    logger.write_block(samples)
+                else:
+                    for sample in samples:
+                        data = {"timestamp": format_timestamp(int(sample["time_ns"])), "timestamp_ns": int(sample["time_ns"])}
+                        data.update({field: float(sample[field]) for field in self.fields})
+                        self.write(data, logger, publisher)
+                self.scheduler.advance()
+        finally:
+            reader.stop()
+
+
+    def stop(self, *args) -> None:
+        self._running = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optris CS Laser headless acquisition")
+    parser.add_argument("--port", nargs="+", required=True, help="one or more serial ports")
+    parser.add_argument("--baudrate", type=int, default=BAUDRATE)
+    parser.add_argument("--interval", type=float, default=0.5, help="polling interval in sec")
+    parser.add_argument("--fields", nargs="+", default=list(SNAPSHOT_FIELDS), choices=list(REGISTERS.keys()))
+    parser.add_argument("--output", type=Path, default=None, help="output file (default: ./<date>_pyrometer.csv|.obr)")
+    parser.add_argument("--format", choices=("csv", "obr"), default="csv")
+    parser.add_argument("--compression", choices=("gzip", "zstd"), default=None, help="csv only")
+    parser.add_argument("--rotate-bytes", type=int, default=None, help="csv only")
+    parser.add_argument("--rotate-seconds", type=float, default=None, help="csv only")
+    parser.add_argument("--duration", type=float, default=None, help="stop after sec (default: until Ctrl+C)")
+    parser.add_argument("--policy", choices=POLICIES, default=SKIP, help="what to do after an overrun")
+    parser.add_argument("--metrics-port", type=int, default=None, help="serve protocol metrics on localhost:<port>/metrics")
+    parser.add_argument("--adaptive", action="store_true", help="adaptive rate and deadband reporting (single port)")
+    parser.add_argument("--max-interval", type=float, default=AdaptivePollingPolicy.max_interval, help="adaptive: sec")
+    parser.add_argument("--rate-threshold", type=float, default=AdaptivePollingPolicy.rate_threshold, help="adaptive: °C/sec")
+    parser.add_argument("--deadband", type=float, default=AdaptivePollingPolicy.deadband, help="adaptive: °C")
+    parser.add_argument("--heartbeat", type=float, default=AdaptivePollingPolicy.heartbeat, help="adaptive: sec")
+    parser.add_argument("--window", nargs="+", default=[], help="rolling statistics windows, e.g. 60s 100 (samples)")
+    parser.add_argument("--ewma", nargs="+", type=float, default=[], help="EWMA time constants in sec")
+    parser.add_argument("--burst", action="store_true", help="read a head streaming in burst mode instead of polling")
+    parser.add_argument("--burst-sync", default="aaaa", help="burst: sync bytes in hex")
+    parser.add_argument("--burst-fields", nargs="+", default=list(BURST_FIELDS), choices=["target_temperature", "head_temperature", "current_target_temperature"])
+    parser.add_argument("--burst-checksum", action="store_true", help="burst: frames end with an XOR checksum")
+    parser.add_argument("--publish", default=None, help="stream live samples, e.g. tcp://127.0.0.1:9106 or unix:///tmp/cslaser.sock")
+    parser.add_argument("--drop-policy", choices=DROP_POLICIES, default=DROP_OLDEST, help="publish: slow subscribers")
+    parser.add_argument("--limit", type=float, default=None, help="interlock: trip above this target temperature in °C")
+    parser.add_argument("--limit-hysteresis", type=float, default=LimitRule.hysteresis, help="interlock: re-arm °C below the limit")
+    parser.add_argument("--max-rate", type=float, default=None, help="interlock: trip above this rate of rise in °C/sec")
+    parser.add_argument("--rate-window", type=float, default=RateRule.window, help="interlock: rate window in sec")
+    parser.add_argument("--rate-hysteresis", type=float, default=RateRule.hysteresis, help="interlock: re-arm °C/sec below the max rate")
+    parser.add_argument("--interlock-action", choices=ACTIONS, default=LASER_OFF)
+    args = parser.parse_args()
+
+    output = args.output or Path(f"{default_filename()}.{args.format}")
+    adaptive_policy = None
+    if args.adaptive:
+        adaptive_policy = AdaptivePollingPolicy(
+            min_interval=args.interval, max_interval=args.max_interval, rate_threshold=args.rate_threshold,
+            deadband=args.deadband, heartbeat=args.heartbeat)
+    burst = None
+    if args.burst:
+        burst = BurstFormat(bytes.fromhex(args.burst_sync), tuple(args.burst_fields), args.burst_checksum)
+    interlock_rules = []
+    if args.limit is not None:
+        interlock_rules.append(LimitRule("limit", args.limit, args.limit_hysteresis, action=args.interlock_action))
+    if args.max_rate is not None:
+        interlock_rules.append(RateRule("rate", args.max_rate, args.rate_window, args.rate_hysteresis,
+                                        action=args.interlock_action))
+    acquisition = HeadlessAcquisition(args.port, args.interval, args.fields, args.policy, adaptive_policy,
+                                      args.window, args.ewma, burst, args.baudrate, interlock_rules)
+    acquisition.connect()
+    for label, interlock in acquisition.interlocks.items():
+        logging.info(f"Interlock armed on {label}: laser-off within "
+                     f"{laser_off_bound(acquisition.controllers[label]) * 1000:.0f} ms of the tripping answer")
+    stats_by_port = {controller.port: controller.stats for controller in acquisition.controllers.values()}
+    metrics_server = serve_metrics(stats_by_port, args.metrics_port) if args.metrics_port is not None else None
+    signal.signal(signal.SIGINT, acquisition.stop)
+    signal.signal(signal.SIGTERM, acquisition.stop)
+    if args.format == "obr":
+        logger = BinaryLogger(output, acquisition.columns, metadata=acquisition.metadata())
+    else:
+        logger = DataLogger(output, compression=args.compression,
+                            rotate_bytes=args.rotate_bytes, rotate_seconds=args.rotate_seconds)
+    logging.info(f"Recording to {logger.path}")
+    publisher = None
+    if args.publish is not None:
+        publisher = LivePublisher(args.publish, acquisition.columns, metadata=acquisition.metadata(),
+                                  drop_policy=args.drop_policy).start()
+    recording_failed = False
+    try:
+        if burst is not None:
+            acquisition.run_burst(logger, args.duration, publisher)
+        else:
+            acquisition.run(logger, args.duration, publisher)
+    finally:
+        try:
+            logger.close()
+        except RuntimeError as e:
+            # writer thread failed: still release the devices and report
+            logging.error(f"Recording incomplete: {e}")
+            recording_failed = True
+        if publisher is not None:
+            publisher.stop()
+        acquisition.disconnect()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        for port, protocol_stats in stats_by_port.items():
+            logging.info(f"Protocol statistics of {port}:\n{protocol_stats.format_text()}")
+        for label, interlock in acquisition.interlocks.items():
+            logging.info(f"Interlock of {label}: {len(interlock.events)} trips, "
+                         f"max trip latency {interlock.max_trip_latency * 1000:.1f} ms")
+        stats = acquisition.scheduler.stats
+        logging.info(
+            f"Recorded {stats.ticks} samples at {stats.achieved_rate:.2f} Hz, "
+            f"jitter {stats.period_jitter * 1000:.1f} ms, {stats.overruns} overruns")
+    if recording_failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
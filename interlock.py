@@ -0,0 +1,202 @@
+"""
+Over-temperature interlock evaluated in the acquisition path
+
+Rules are checked on every polled sample (also the ones adaptive polling does not report)
+on the thread which owns the port. A trip switches the laser off (0x90 00) right there,
+so the reaction does not wait for the GUI; the latency from the answer of the tripping
+sample to the acknowledged laser-off is recorded in each TripEvent.
+"""
+from collections import deque
+from dataclasses import dataclass
+import logging
+import math
+import time
+from typing import Callable, Optional
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+LASER_OFF = "laser_off" # send 0x90 00
+NOTIFY = "notify" # only raise the event
+ACTIONS = (LASER_OFF, NOTIFY)
+MAX_EVENTS = 1000 # trip events kept in Interlock.events
+
+
+@dataclass(frozen=True)
+class LimitRule:
+    """
+    Trips when field > high, re-arms when field < high - hysteresis
+    """
+    name: str
+    high: float # °C
+    hysteresis: float = 5.0 # °C
+    field: str = "target_temperature"
+    action: str = LASER_OFF
+
+
+@dataclass(frozen=True)
+class RateRule:
+    """
+    Trips when field rises faster than max_rate over window sec,
+    re-arms when the rate is below max_rate - hysteresis
+    """
+    name: str
+    max_rate: float # °C/sec
+    window: float = 1.0 # sec
+    hysteresis: float = 1.0 # °C/sec
+    field: str = "target_temperature"
+    action: str = LASER_OFF
+
+
+@dataclass
+class TripEvent:
+    rule: str
+    field: str
+    value: float # °C or °C/sec that tripped the rule
+    limit: float
+    action: str
+    action_ok: Optional[bool] # None: no device action
+    sample_time_ns: Optional[int] # unix ns when the tripping answer arrived
+    detection_latency: Optional[float] # sec, answer -> rule evaluated
+    trip_latency: Optional[float] # sec, answer -> action done (laser off acknowledged)
+
+
+def laser_off_bound(controller) -> float:
+    """
+    Worst case sec from a trip to the end of the laser-off transaction (90 00 -> 00):
+    every attempt times out and drains the line for the capped time
+    """
+    return controller.transact_bound(2, 1)
+
+
+class _RuleState:
+    def __init__(self, rule):
+        self.rule = rule
+        self.tripped = False
+        self.action_pending = False # laser-off not acknowledged yet, retried on every sample
+        self.history = deque() # (t, value) of the rate window
+
+
+    def measure(self, t: float, value: float) -> Optional[float]:
+        rule = self.rule
+        if isinstance(rule, LimitRule):
+            return value
+        self.history.append((t, value))
+        while len(self.history) > 2 and t - self.history[1][0] >= rule.window:
+            self.history.popleft()
+        t0, v0 = self.history[0]
+        if t - t0 <= 0:
+            return None
+        return (value - v0) / (t - t0)
+
+
+    def update(self, measured: float) -> bool:
+        """
+        -> True on the transition armed -> tripped
+        """
+        rule = self.rule
+        limit = rule.high if isinstance(rule, LimitRule) else rule.max_rate
+        if not self.tripped and measured > limit:
+            self.tripped = True
+            return True
+        if self.tripped and measured < limit - rule.hysteresis:
+            self.tripped = False
+        return False
+
+
+class Interlock:
+    """
+    Limit / rate-of-rise rules with hysteresis; call check() right after read_snapshot.
+    A LASER_OFF trip blocks the acquisition thread for at most laser_off_bound(controller) sec
+    (all retries with their capped drains); a laser-off which is still not acknowledged
+    is sent again with every following sample.
+    listeners(TripEvent) are called on the acquisition thread; keep them short.
+    """
+    def __init__(self, rules, listeners=()):
+        for rule in rules:
+            if rule.action not in ACTIONS:
+                raise ValueError(f"Unknown interlock action: {rule.action}")
+        self.rules = list(rules)
+        self.listeners = list(listeners)
+        self.events = deque(maxlen=MAX_EVENTS)
+        self.max_trip_latency = 0.0 # sec
+        self._states = [_RuleState(rule) for rule in self.rules]
+
+
+    @property
+    def tripped(self) -> list:
+        return [state.rule.name for state in self._states if state.tripped]
+
+
+    @property
+    def inhibits_laser(self) -> bool:
+        """
+        True while a LASER_OFF rule is tripped (not yet re-armed by its hysteresis)
+        """
+        return any(state.tripped and state.rule.action == LASER_OFF for state in self._states)
+
+
+    def add_listener(self, listener: Callable[[TripEvent], None]) -> None:
+        self.listeners.append(listener)
+
+
+    def check(self, snapshot, controller=None) -> list:
+        """
+        snapshot: CSLaserSnapshot (time_ns / monotonic_ns of user-visible arrival)
+        controller: OptrisCSLaserControl to act on
+        -> TripEvents raised by this sample
+        """
+        if snapshot is None:
+            return []
+        arrival_ns = snapshot.monotonic_ns
+        t = arrival_ns / 1e9 if arrival_ns is not None else time.perf_counter()
+        events = []
+        laser_off = None # one 0x90 00 per sample even if several rules trip
+        if controller is not None and any(state.action_pending for state in self._states):
+            laser_off = self._laser_off(controller)
+            for state in self._states:
+                state.action_pending = state.action_pending and not laser_off
+            if not laser_off:
+                logging.error("Interlock: laser-off still not acknowledged")
+        for state in self._states:
+            rule = state.rule
+            value = getattr(snapshot, rule.field, None)
+            if value is None or math.isnan(value):
+                continue
+            measured = state.measure(t, value)
+            if measured is None or not state.update(measured):
+                continue
+            detected_ns = time.perf_counter_ns()
+            action_ok = None
+            if rule.action == LASER_OFF and controller is not None:
+                if laser_off is None:
+                    laser_off = self._laser_off(controller)
+                action_ok = laser_off
+                state.action_pending = not laser_off
+            done_ns = time.perf_counter_ns()
+            event = TripEvent(
+                rule=rule.name, field=rule.field, value=measured,
+                limit=rule.high if isinstance(rule, LimitRule) else rule.max_rate,
+                action=rule.action, action_ok=action_ok, sample_time_ns=snapshot.time_ns,
+                detection_latency=(detected_ns - arrival_ns) / 1e9 if arrival_ns is not None else None,
+                trip_latency=(done_ns - arrival_ns) / 1e9 if arrival_ns is not None else None,
+            )
+            if event.trip_latency is not None:
+                self.max_trip_latency = max(self.max_trip_latency, event.trip_latency)
+            self.events.append(event)
+            events.append(event)
+            logging.warning(
+                f"Interlock {rule.name} tripped: {rule.field} {measured:.2f} > {event.limit}, "
+                f"action {rule.action} ({ {True: 'ok', False: 'FAILED', None: 'no device action'}[action_ok]})"
+                + (f", {event.trip_latency * 1000:.1f} ms after the answer" if event.trip_latency is not None else ""))
+        for event in events:
+            for listener in self.listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    logging.error(f"Interlock listener failed: {e}")
+        return events
+
+
+    @staticmethod
+    def _laser_off(controller) -> bool:
+        return controller.set_laser(False)
@@ -0,0 +1,306 @@
+"""
+Live sample stream for other processes on the same machine
+
+Wire format (little endian)
+    header: MAGIC, u32 length, UTF-8 JSON {"version", "columns", "metadata"}
+    frames: f8 timestamp (unix sec), f4 per column (NaN: no value)
+
+Example)
+    publisher = LivePublisher("tcp://127.0.0.1:9106", ["target_temperature"])
+    publisher.publish(time.time(), {"target_temperature": 25.3})
+
+    for timestamp, values in subscribe("tcp://127.0.0.1:9106"):
+        print(timestamp, values["target_temperature"])
+"""
+from collections import deque
+import json
+import logging
+import math
+import os
+import selectors
+import socket
+import struct
+import threading
+from typing import Optional
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+MAGIC = b"CSLIVE01"
+VERSION = 1
+LIVE_ADDRESS = "tcp://127.0.0.1:9106"
+QUEUE_FRAMES = 4096 # per client, ~ 30 min at 2 Hz
+INBOX_FRAMES = 65536 # frames published but not yet fanned out
+SEND_CHUNK = 1 << 16 # bytes handed to one send()
+
+DROP_OLDEST = "drop_oldest" # a slow client loses its oldest queued frames
+DROP_NEWEST = "drop_newest" # a slow client loses the frames published while its queue is full
+DISCONNECT = "disconnect" # a slow client is disconnected
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, DISCONNECT)
+
+
+def parse_address(address: str):
+    """
+    "tcp://host:port" or "unix:///path/to/socket" -> (family, sockaddr)
+    """
+    if address.startswith("tcp://"):
+        host, _, port = address[len("tcp://"):].rpartition(":")
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    if address.startswith("unix://"):
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError("UNIX sockets are not supported on this platform")
+        return socket.AF_UNIX, address[len("unix://"):]
+    raise ValueError(f"Unknown live stream address: {address}")
+
+
+class _Client:
+    def __init__(self, sock: socket.socket, name: str, header: bytes, queue_frames: int):
+        self.sock = sock
+        self.name = name
+        self.frames = deque()
+        self.queue_frames = queue_frames
+        self.out = bytearray(header)
+        self.sent = 0 # frames
+        self.dropped = 0 # frames
+
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.out or self.frames)
+
+
+class LivePublisher:
+    """
+    Fans compact binary sample frames out to any number of local subscribers
+    publish() only packs the frame and hands it to the server thread, so a slow or
+    stuck subscriber never blocks the caller (the polling thread). Every client has its
+    own bounded queue; when it is full, drop_policy decides what is lost.
+    """
+    def __init__(self, address: str, columns, metadata: Optional[dict] = None,
+                 queue_frames: int = QUEUE_FRAMES, drop_policy: str = DROP_OLDEST):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.address = address
+        self.columns = list(columns)
+        self.queue_frames = queue_frames
+        self.drop_policy = drop_policy
+        self.frame = struct.Struct("<d" + "f" * len(self.columns))
+        header = json.dumps({"version": VERSION, "columns": self.columns, "metadata": metadata or {}}).encode("utf-8")
+        self.header = MAGIC + struct.pack("<I", len(header)) + header
+        self._inbox = deque(maxlen=INBOX_FRAMES) # append / popleft are thread safe
+        self._clients = {} # fileno -> _Client
+        self._running = False
+        self._thread = None
+        self._wake_pending = threading.Event()
+        self._selector = None
+        self._listener = None
+        self._wake_r, self._wake_w = socket.socketpair()
+
+
+    def start(self) -> "LivePublisher":
+        family, sockaddr = parse_address(self.address)
+        if family != socket.AF_INET and os.path.exists(sockaddr):
+            os.unlink(sockaddr)
+        self._listener = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(sockaddr)
+        self._listener.listen()
+        self._listener.setblocking(False)
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listener, selectors.EVENT_READ, "accept")
+        self._selector.register(self._wake_r, selectors.EVENT_READ, "wake")
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name="LivePublisher", daemon=True)
+        self._thread.start()
+        logging.info(f"Publishing live samples on {self.address}")
+        return self
+
+
+    def stop(self) -> None:
+        if not self._running:
+            return
+        self._running = False
+        self._wake()
+        self._thread.join()
+        for client in list(self._clients.values()):
+            self._close(client)
+        self._selector.close()
+        self._listener.close()
+        self._wake_r.close()
+        self._wake_w.close()
+        family, sockaddr = parse_address(self.address)
+        if family != socket.AF_INET and os.path.exists(sockaddr):
+            os.unlink(sockaddr)
+
+
+    def __enter__(self):
+        return self.start()
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+    def publish(self, timestamp: float, values: dict) -> None:
+        """
+        Queue one sample for all subscribers (never blocks)
+        """
+        row = [math.nan if values.get(column) is None else values[column] for column in self.columns]
+        self._inbox.append(self.frame.pack(timestamp, *row))
+        if not self._wake_pending.is_set():
+            self._wake_pending.set()
+            self._wake()
+
+
+    def publish_snapshot(self, timestamp: float, snapshot) -> None:
+        self.publish(timestamp, {column: getattr(snapshot, column, None) for column in self.columns})
+
+
+    @property
+    def clients(self) -> dict:
+        """
+        -> {client: {"queued", "sent", "dropped"}}
+        """
+        return {
+            client.name: {"queued": len(client.frames), "sent": client.sent, "dropped": client.dropped}
+            for client in list(self._clients.values())
+        }
+
+
+    def _wake(self) -> None:
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass # already pending or shutting down
+
+
+    def _serve(self) -> None:
+        while self._running:
+            for key, events in self._selector.select(timeout=1.0):
+                if key.data == "accept":
+                    self._accept()
+                elif key.data == "wake":
+                    try:
+                        self._wake_r.recv(4096)
+                    except BlockingIOError:
+                        pass
+                else:
+                    client = key.data
+                    if events & selectors.EVENT_READ and not self._receive(client):
+                        continue
+                    if events & selectors.EVENT_WRITE:
+                        self._send(client)
+            self._wake_pending.clear()
+            self._fan_out()
+
+
+    def _accept(self) -> None:
+        try:
+            sock, peer = self._listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        client = _Client(sock, str(peer) or f"unix:{sock.fileno()}", self.header, self.queue_frames)
+        self._clients[sock.fileno()] = client
+        self._selector.register(sock, selectors.EVENT_READ | selectors.EVENT_WRITE, client)
+        logging.info(f"Live subscriber {client.name} connected")
+
+
+    def _receive(self, client: _Client) -> bool:
+        # subscribers do not talk, readable means closed (or garbage to discard)
+        try:
+            if client.sock.recv(4096):
+                return True
+        except BlockingIOError:
+            return True
+        except OSError:
+            pass
+        self._close(client)
+        return False
+
+
+    def _fan_out(self) -> None:
+        while True:
+            try:
+                frame = self._inbox.popleft()
+            except IndexError:
+                break
+            for client in list(self._clients.values()):
+                if len(client.frames) < client.queue_frames:
+                    client.frames.append(frame)
+                elif self.drop_policy == DROP_OLDEST:
+                    client.frames.popleft()
+                    client.frames.append(frame)
+                    client.dropped += 1
+                elif self.drop_policy == DROP_NEWEST:
+                    client.dropped += 1
+                else:
+                    logging.warning(f"Live subscriber {client.name} too slow, disconnecting")
+                    self._close(client)
+        for client in list(self._clients.values()):
+            if client.pending:
+                self._send(client)
+
+
+    def _send(self, client: _Client) -> None:
+        while client.frames and len(client.out) < SEND_CHUNK:
+            client.out += client.frames.popleft()
+            client.sent += 1
+        if client.out:
+            try:
+                sent = client.sock.send(client.out)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                self._close(client)
+                return
+            del client.out[:sent]
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if client.pending else 0)
+        self._selector.modify(client.sock, events, client)
+
+
+    def _close(self, client: _Client) -> None:
+        if self._clients.pop(client.sock.fileno(), None) is None:
+            return
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+        logging.info(f"Live subscriber {client.name} disconnected ({client.sent} sent, {client.dropped} dropped)")
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Live stream closed")
+        data += chunk
+    return bytes(data)
+
+
+def subscribe(address: str = LIVE_ADDRESS, timeout: Optional[float] = None):
+    """
+    Generator of (timestamp, {column: value}) from a LivePublisher
+    """
+    family, sockaddr = parse_address(address)
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(sockaddr)
+        if _recv_exact(sock, len(MAGIC)) != MAGIC:
+            raise ValueError(f"{address} is not a CS Laser live stream")
+        length, = struct.unpack("<I", _recv_exact(sock, 4))
+        header = json.loads(_recv_exact(sock, length).decode("utf-8"))
+        columns = header["columns"]
+        frame = struct.Struct("<d" + "f" * len(columns))
+        try:
+            while True:
+                timestamp, *row = frame.unpack(_recv_exact(sock, frame.size))
+                yield timestamp, {
+                    column: None if math.isnan(value) else value for column, value in zip(columns, row)
+                }
+        except ConnectionError:
+            return
@@ -0,0 +1,127 @@
+import csv
+import io
+import logging
+import numpy as np
+from data_logger import ENCODING, INDEX_STRIDE, INDEX_ENTRY, index_path, list_segments, open_segment, to_ns
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+INDEX_DTYPE = np.dtype([("timestamp_ns", "<i8"), ("offset", "<i8")])
+
+
+class CSVLogReader:
+    """
+    Time-range reader for CSV files written by DataLogger.
+    Uses the sparse sidecar index (timestamp -> byte offset every INDEX_STRIDE rows)
+    to seek close to the start of a range: O(log n) lookup + at most INDEX_STRIDE
+    rows skipped, independent of the file size. A missing index is built once by
+    scanning the file and saved next to it.
+    """
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        with open(self.csv_path, "rb") as f:
+            header = f.readline()
+            self._data_offset = f.tell()
+        self.fieldnames = next(csv.reader([header.decode(ENCODING)]))
+        self.index = self._load_index()
+
+
+    def _load_index(self) -> np.ndarray:
+        path = index_path(self.csv_path)
+        if path.exists():
+            size = path.stat().st_size - path.stat().st_size % INDEX_DTYPE.itemsize
+            return np.fromfile(path, dtype=INDEX_DTYPE, count=size // INDEX_DTYPE.itemsize)
+        logging.info(f"No time index for {self.csv_path}, building it")
+        return self.build_index()
+
+
+    def build_index(self) -> np.ndarray:
+        entries = []
+        timestamp_column = self.fieldnames.index("timestamp")
+        with open(self.csv_path, "rb") as f:
+            f.seek(self._data_offset)
+            rows = 0
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if rows % INDEX_STRIDE == 0:
+                    row = next(csv.reader([line.decode(ENCODING)]))
+                    entries.append((to_ns(row[timestamp_column]), offset))
+                rows += 1
+        index = np.array(entries, dtype=INDEX_DTYPE)
+        with open(index_path(self.csv_path), "wb") as f_idx:
+            for timestamp_ns, offset in entries:
+                f_idx.write(INDEX_ENTRY.pack(timestamp_ns, offset))
+        return index
+
+
+    def _seek_offset(self, t_start_ns: int) -> int:
+        # last indexed row strictly before t_start: rows sharing the t_start stamp
+        # may precede an index entry with that stamp
+        i = np.searchsorted(self.index["timestamp_ns"], t_start_ns, side="left") - 1
+        if i < 0:
+            return self._data_offset
+        return int(self.index["offset"][i])
+
+
+    def read_range(self, t_start, t_end):
+        """
+        Yield rows (dict of str) with t_start <= timestamp <= t_end
+        t_start / t_end: datetime, ISO string, unix sec (float) or unix ns (int)
+        """
+        t_start_ns, t_end_ns = to_ns(t_start), to_ns(t_end)
+        with open(self.csv_path, "rb") as f:
+            f.seek(self._seek_offset(t_start_ns))
+            reader = csv.DictReader(io.TextIOWrapper(f, encoding=ENCODING, newline=""), fieldnames=self.fieldnames)
+            for row in reader:
+                timestamp_ns = to_ns(row["timestamp"])
+                if timestamp_ns < t_start_ns:
+                    continue
+                if timestamp_ns > t_end_ns:
+                    break
+                yield row
+
+
+class SegmentedLogReader:
+    """
+    Presents all (rotated / compressed) segments written by DataLogger for csv_path
+    as one continuous stream of rows (dict of str).
+    """
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.segments = list_segments(csv_path)
+        if not self.segments:
+            raise FileNotFoundError(f"No recording found for {csv_path}")
+
+
+    @staticmethod
+    def _rows(path):
+        with open_segment(path) as f:
+            yield from csv.DictReader(io.TextIOWrapper(f, encoding=ENCODING, newline=""))
+
+
+    def __iter__(self):
+        for path in self.segments:
+            yield from self._rows(path)
+
+
+    def read_range(self, t_start, t_end):
+        """
+        Yield rows with t_start <= timestamp <= t_end; plain segments are seeked
+        through their time index, compressed segments are streamed.
+        """
+        t_start_ns, t_end_ns = to_ns(t_start), to_ns(t_end)
+        for path in self.segments:
+            if path.suffix == ".csv":
+                rows = CSVLogReader(path).read_range(t_start_ns, t_end_ns)
+            else:
+                rows = self._rows(path)
+            for row in rows:
+                timestamp_ns = to_ns(row["timestamp"])
+                if timestamp_ns < t_start_ns:
+                    continue
+                if timestamp_ns > t_end_ns:
+                    return
+                yield row
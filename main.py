@@ -1,12 +1,26 @@
 from PyQt6.QtWidgets import QApplication, QWidget, QHBoxLayout, QFrame
 from PyQt6.QtCore import QLocale
-from cslaser_widget import CSLaserWidget
+from cslaser_widget import CSLaserWidget, POLLING_FIELDS
 from chart_widget import ChartWidget
-from data_collector import DataCollector
-from data_logger import DataLogger
+from data_collector import DataCollector, FrameDataCollector
+from acquisition_manager import AcquisitionManager
+from acquisition_polling_thread import AcquisitionPollingThread
+from live_publisher import LivePublisher
+from replay import ReplaySource
+from interlock import Interlock, LimitRule, RateRule
+import argparse
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Optris Pyrometer CSLaser")
+    parser.add_argument("--ports", nargs="+", default=None, help="poll several heads, e.g. --ports COM3 COM4")
+    parser.add_argument("--replay", default=None, help="replay a recording (.csv / .obr) instead of a device")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay: time scale, 0: as fast as possible")
+    parser.add_argument("--publish", default=None, help="stream live samples, e.g. tcp://127.0.0.1:9106 (single head)")
+    parser.add_argument("--limit", type=float, default=None, help="interlock: laser off above this target temperature in °C")
+    parser.add_argument("--max-rate", type=float, default=None, help="interlock: laser off above this rate of rise in °C/sec")
+    args = parser.parse_args()
+
     app = QApplication([])
 
     QLocale.setDefault(QLocale.c())
@@ -18,22 +32,47 @@ def main():
     frame = QFrame()
     frame_layout = QHBoxLayout(frame)
     polling_interval = 0.5 # sec
-    pyrometer_widget = CSLaserWidget(polling_interval=polling_interval)
-    data_collector = DataCollector(pyrometer_widget)
-    chart_widget = ChartWidget(data_collector)
-    frame_layout.addWidget(pyrometer_widget)
+    interlock_rules = []
+    if args.limit is not None:
+        interlock_rules.append(LimitRule("limit", args.limit))
+    if args.max_rate is not None:
+        interlock_rules.append(RateRule("rate", args.max_rate))
+    if args.ports:
+        acquisition_manager = AcquisitionManager(args.ports)
+        acquisition_manager.connect()
+        polling_thread = AcquisitionPollingThread(acquisition_manager, polling_interval, interlock_rules)
+        polling_thread.tripped.connect(
+            lambda label, event: win.setWindowTitle(
+                f"Optris Pyrometer CSLaser - interlock {event.rule} tripped on {label}"))
+        polling_thread.start()
+        data_collector = FrameDataCollector(acquisition_manager)
+        chart_widget = ChartWidget(data_collector)
+    else:
+        publisher = LivePublisher(args.publish, POLLING_FIELDS).start() if args.publish else None
+        interlock = Interlock(interlock_rules) if interlock_rules else None
+        pyrometer_widget = CSLaserWidget(polling_interval=polling_interval, publisher=publisher, interlock=interlock)
+        data_collector = DataCollector(pyrometer_widget)
+        chart_widget = ChartWidget(data_collector)
+        frame_layout.addWidget(pyrometer_widget)
+        if args.replay:
+            pyrometer_widget.start_replay(ReplaySource(args.replay, args.speed))
     frame_layout.addWidget(chart_widget)
     layout.addWidget(frame)
-    layout.addWidget
-
-    polling_interval = 0.5 # sec
-    pyrometer_widget = CSLaserWidget(polling_interval=polling_interval)
 
     win.setLayout(layout)
     win.show()
 
     app.exec()
 
+    if args.ports:
+        polling_thread.stop()
+        acquisition_manager.disconnect()
+    else:
+        if args.replay:
+            pyrometer_widget.stop_replay()
+        if publisher is not None:
+            publisher.stop()
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,7 +1,10 @@
 import serial
 import logging
+from dataclasses import asdict, dataclass
+import math
 from typing import Optional
 import time
+from protocol_stats import ProtocolStats
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 BAUDRATE = 9600
@@ -9,26 +12,124 @@ DATA_BITS = serial.EIGHTBITS
 PARITY = serial.PARITY_NONE
 STOP_BITS = serial.STOPBITS_ONE
 TIMEOUT = 1.0
+BITS_PER_BYTE = 10 # start bit + 8 data bits + stop bit
+RESPONSE_MARGIN = 0.05 # sec, device processing time + OS / USB latency allowed per answer
+RETRIES = 2 # extra attempts after a short, missing or misaligned answer
+# sec, how long a read value of slowly changing registers is served from memory
+CACHE_TTL = {
+    "serial_number": math.inf,
+    "emissivity": 60.0,
+    "laser": 5.0,
+}
+
+
+def answer_deadline(baudrate: int, bytes_out: int, bytes_in: int, margin: float = RESPONSE_MARGIN) -> float:
+    """
+    Time a complete answer may take: transmission of command + answer at baudrate plus margin,
+    rounded up to 10 msec (changing the port timeout is a system call on some platforms)
+    """
+    deadline = (bytes_out + bytes_in) * BITS_PER_BYTE / baudrate + margin
+    return math.ceil(deadline * 100) / 100
+
+
+def decode_temperature(res: bytes) -> float:
+    return (res[0] * 256 + res[1] - 1000) / 10.0
+
+
+def decode_emissivity(res: bytes) -> float:
+    return (res[0] * 256 + res[1]) / 1000.0
+
+
+def decode_serial_number(res: bytes) -> int:
+    return res[0] * 65536 + res[1] * 256 + res[2]
+
+
+def decode_laser(res: bytes) -> bool:
+    return res[0] == 1
+
+
+# field name -> (HEX command, answer length in bytes, decoder)
+REGISTERS = {
+    "target_temperature": (0x01, 2, decode_temperature),
+    "head_temperature": (0x02, 2, decode_temperature),
+    "current_target_temperature": (0x03, 2, decode_temperature),
+    "emissivity": (0x04, 2, decode_emissivity),
+    "serial_number": (0x0E, 3, decode_serial_number),
+    "laser": (0x10, 1, decode_laser),
+}
+SNAPSHOT_FIELDS = ("target_temperature", "head_temperature", "current_target_temperature", "emissivity", "laser")
+
+
+@dataclass
+class CSLaserSnapshot:
+    """
+    Device state read in a single burst by OptrisCSLaserControl.read_snapshot()
+    Fields which were not requested (or not answered) are None
+    """
+    target_temperature: Optional[float] = None
+    head_temperature: Optional[float] = None
+    current_target_temperature: Optional[float] = None
+    emissivity: Optional[float] = None
+    serial_number: Optional[int] = None
+    laser: Optional[bool] = None
+    time_ns: Optional[int] = None # unix ns when the answer arrived
+    monotonic_ns: Optional[int] = None # time.perf_counter_ns() when the answer arrived
+    latency: Optional[float] = None # sec, request -> answer of the last attempt
+
+
+    @property
+    def timestamp(self) -> Optional[float]:
+        return self.time_ns / 1e9 if self.time_ns is not None else None
+
+
+    def to_dict(self) -> dict:
+        return asdict(self)
 
 
 class OptrisCSLaserControl:
-    def __init__(self, port: str, baudrate: int = BAUDRATE, timeout:float = TIMEOUT):
+    """
+    timeout: default read timeout of the port
+    Answers are read against a per-command deadline (see answer_deadline()); a short,
+    missing or misaligned answer drains the input (for at most one deadline) and is retried
+    up to retries times, so a transaction never takes longer than transact_bound().
+    serial_number, emissivity and laser are cached for cache_ttl[field] sec (see CACHE_TTL);
+    the setters (0x84, 0x90) update the cache with the value echoed by the device.
+    """
+    def __init__(self, port: str, baudrate: int = BAUDRATE, timeout:float = TIMEOUT,
+                 retries: int = RETRIES, response_margin: float = RESPONSE_MARGIN, cache_ttl: Optional[dict] = None):
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
+        self.retries = retries
+        self.response_margin = response_margin
+        self.cache_ttl = dict(CACHE_TTL if cache_ttl is None else cache_ttl)
         self.serial = None
+        self.stats = ProtocolStats()
+        self.reply_time_ns = None # unix ns of the last answer
+        self.reply_monotonic_ns = None # time.perf_counter_ns() of the last answer
+        self.reply_latency = None # sec, request -> last answer
+        self._cache = {} # field -> (value, expiry on time.monotonic())
 
 
-    def connect(self):
+    def connect(self, dtr_reset: bool = True):
+        """
+        dtr_reset: toggle DTR (1 sec) before talking to the device;
+        can be skipped for a port where the head already answered (see port_discovery)
+        """
         if not self.serial or not self.serial.is_open:
             try:
                 self.serial = serial.Serial(
                     port=self.port, baudrate=self.baudrate, timeout=self.timeout, bytesize=DATA_BITS,
                     parity=PARITY, stopbits=STOP_BITS, xonxoff=False)
-                self.serial.dtr = False
-                time.sleep(0.5)
-                self.serial.dtr = True
-                time.sleep(0.5)
+                if dtr_reset:
+                    try:
+                        self.serial.dtr = False
+                        time.sleep(0.5)
+                        self.serial.dtr = True
+                        time.sleep(0.5)
+                    except OSError as e:
+                        # pseudo-terminals (e.g. cslaser_emulator) have no modem lines
+                        logging.warning(f"DTR reset not supported on {self.port}: {e}")
                 self.serial.reset_input_buffer()
                 self.serial.reset_output_buffer()
                 logging.info(f"Connected to Optris CS Laser on {self.port}.")
@@ -41,6 +142,7 @@ class OptrisCSLaserControl:
         if self.serial is None:
             logging.warning("No serial connection to disconnect.")
             return
+        self.invalidate()
         if self.serial.is_open:
             try:
                 self.serial.close()
@@ -65,36 +167,172 @@ class OptrisCSLaserControl:
             logging.warning("No serial connection established. Cannot send command.")
             return
         if self.serial.is_open:
-            self.serial.flush()
+            # stale bytes (late answer to an earlier command) would shift this answer
+            self.serial.reset_input_buffer()
             self.serial.write(hex_command)
             #logging.info(f"Sending command: {hex_command}")
     
 
-    def read_response(self, read_bytes: int) -> Optional[str]:
+    def read_response(self, read_bytes: int, timeout: Optional[float] = None) -> Optional[str]:
         if self.serial is None:
             return None
         if self.serial.is_open:
             try:
+                timeout = self.timeout if timeout is None else timeout
+                if self.serial.timeout != timeout:
+                    self.serial.timeout = timeout
                 return self.serial.read(read_bytes)
             except serial.SerialException as e:
                 logging.error(f"Failed to read response: {e}")
                 return None
-    
+
+
+    def _drain_idle(self) -> float:
+        return max(2 * BITS_PER_BYTE / self.baudrate, 0.002)
+
+
+    def _drain(self, limit: float) -> None:
+        """
+        Wait until the line is quiet for two byte times and discard what arrived,
+        but give up after limit sec (a chattering line or a head left in burst mode)
+        """
+        idle = self._drain_idle()
+        end = time.perf_counter() + limit
+        time.sleep(idle)
+        while self.serial.in_waiting:
+            self.serial.reset_input_buffer()
+            if time.perf_counter() >= end:
+                logging.warning(f"Line of {self.port} still busy after {limit * 1000:.0f} ms of draining")
+                return
+            time.sleep(idle)
+
+
+    def transact_bound(self, bytes_out: int, bytes_in: int) -> float:
+        """
+        Worst case sec of transact(): every attempt times out and is followed by a capped drain
+        """
+        deadline = answer_deadline(self.baudrate, bytes_out, bytes_in, self.response_margin)
+        return (self.retries + 1) * (2 * deadline + 2 * self._drain_idle())
+
+
+    def transact(self, hex_command: bytes, read_bytes: int, name: Optional[str] = None) -> Optional[bytes]:
+        """
+        send_command() + read_response() framed to exactly read_bytes:
+        each attempt waits at most answer_deadline(); a short answer or trailing
+        bytes (misaligned stream) drains the input and retries.
+        Round trip time and byte counts are recorded in self.stats under name
+        (default: opcode, e.g. "0x01"). The arrival time of the answer is kept in
+        reply_time_ns / reply_monotonic_ns / reply_latency.
+        """
+        if self.serial is None or not self.serial.is_open:
+            logging.warning("No serial connection established. Cannot send command.")
+            return None
+        name = name or f"0x{hex_command[0]:02X}"
+        deadline = answer_deadline(self.baudrate, len(hex_command), read_bytes, self.response_margin)
+        res = None
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter_ns()
+            self.send_command(hex_command)
+            res = self.read_response(read_bytes, timeout=deadline)
+            if res is None:
+                return None
+            # perf_counter: monotonic and fine grained on every platform (time.monotonic is ~16 ms on Windows)
+            self.reply_monotonic_ns = time.perf_counter_ns()
+            self.reply_time_ns = time.time_ns()
+            self.reply_latency = (self.reply_monotonic_ns - start) / 1e9
+            self.stats.record(name, len(hex_command), len(res), read_bytes, self.reply_latency)
+            try:
+                aligned = len(res) == read_bytes and not self.serial.in_waiting
+            except (serial.SerialException, OSError):
+                aligned = len(res) == read_bytes
+            if aligned:
+                return res
+            self.stats.resync(name)
+            self._drain(deadline)
+        logging.error(f"No valid answer to {hex_command.hex()} after {self.retries + 1} attempts")
+        return res
+
+
+    def cached(self, field: str):
+        """
+        Cached value of field if still valid, else None (never touches the port)
+        """
+        entry = self._cache.get(field)
+        if entry is None or time.monotonic() >= entry[1]:
+            return None
+        return entry[0]
+
+
+    def _store(self, field: str, value) -> None:
+        ttl = self.cache_ttl.get(field)
+        if ttl and value is not None:
+            self._cache[field] = (value, time.monotonic() + ttl)
+
+
+    def invalidate(self, field: Optional[str] = None) -> None:
+        if field is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(field, None)
+
+
+    def _read_register(self, field: str):
+        value = self.cached(field)
+        if value is not None:
+            return value
+        command, answer_length, decoder = REGISTERS[field]
+        res = self.transact(bytes([command]), answer_length)
+        try:
+            value = decoder(res)
+        except (TypeError, IndexError) as e:
+            self.stats.parse_failure(f"0x{command:02X}")
+            logging.error(f"Failed to parse {field.replace('_', ' ')}: {e}")
+            return None
+        self._store(field, value)
+        return value
+
+
+    def read_snapshot(self, fields=SNAPSHOT_FIELDS) -> Optional[CSLaserSnapshot]:
+        """
+        Read several registers in one round trip.
+        All HEX commands are written in one burst and the concatenated answers
+        are read at once, e.g. 01 02 10 -> 2 + 2 + 1 bytes.
+        Answers are decoded in request order; a short read leaves the fields
+        after the missing bytes as None.
+        """
+        unknown = [field for field in fields if field not in REGISTERS]
+        if unknown:
+            raise ValueError(f"Unknown snapshot fields: {unknown}")
+        if self.serial is None or not self.serial.is_open:
+            return None
+        hex_command = bytes(REGISTERS[field][0] for field in fields)
+        answer_length = sum(REGISTERS[field][1] for field in fields)
+        res = self.transact(hex_command, answer_length, name="snapshot")
+        if res is None:
+            return None
+        if len(res) < answer_length:
+            logging.error(f"Snapshot answer too short: {len(res)}/{answer_length} bytes")
+        snapshot = CSLaserSnapshot(
+            time_ns=self.reply_time_ns, monotonic_ns=self.reply_monotonic_ns, latency=self.reply_latency)
+        offset = 0
+        for field in fields:
+            _, length, decoder = REGISTERS[field]
+            chunk = res[offset:offset + length]
+            offset += length
+            if len(chunk) < length:
+                break
+            setattr(snapshot, field, decoder(chunk))
+            self._store(field, getattr(snapshot, field))
+        return snapshot
+
+
     @property
     def serial_number(self) -> Optional[int]:
         """
         HEX command: 0x0E
         Answer format: 3 bytes
         """
-        hex_command = b'\x0E'
-        self.send_command(hex_command)
-        res = self.read_response(3)
-        try:
-            byte1, byte2, byte3 = res[0], res[1], res[2]
-            return byte1 * 65536 + byte2 * 256 + byte3
-        except (TypeError, IndexError) as e:
-            logging.error(f"Failed to parse serial number: {e}")
-            return None
+        return self._read_register("serial_number")
     
 
     @property
@@ -103,15 +341,7 @@ class OptrisCSLaserControl:
         HEX command: 0x01
         Answer format: 2 bytes (Celsius)
         """
-        hex_command = b'\x01'
-        self.send_command(hex_command)
-        res = self.read_response(2)
-        try:
-            byte1, byte2 = res[0], res[1]
-            return (byte1 * 256 + byte2 - 1000) / 10.0
-        except (TypeError, IndexError) as e:
-            logging.error(f"Failed to parse target temperature: {e}")
-            return None
+        return self._read_register("target_temperature")
     
 
     @property
@@ -120,15 +350,7 @@ class OptrisCSLaserControl:
         HEX command: 0x02
         Answer format: 2 bytes (Celsius)
         """
-        hex_command = b'\x02'
-        self.send_command(hex_command)
-        res = self.read_response(2)
-        try:
-            byte1, byte2 = res[0], res[1]
-            return (byte1 * 256 + byte2 - 1000) / 10.0
-        except (TypeError, IndexError) as e:
-            logging.error(f"Failed to parse head temperature: {e}")
-            return None
+        return self._read_register("head_temperature")
     
 
     @property
@@ -137,15 +359,7 @@ class OptrisCSLaserControl:
         HEX command: 0x03
         Answer format: 2 bytes (Celsius)
         """
-        hex_command = b'\x03'
-        self.send_command(hex_command)
-        res = self.read_response(2)
-        try:
-            byte1, byte2 = res[0], res[1]
-            return (byte1 * 256 + byte2 - 1000) / 10.0
-        except (TypeError, IndexError) as e:
-            logging.error(f"Failed to parse current target temperature: {e}")
-            return None
+        return self._read_register("current_target_temperature")
     
 
     @property
@@ -154,15 +368,7 @@ class OptrisCSLaserControl:
         HEX command: 0x04
         Answer format: 2 bytes (0.01 steps)
         """
-        hex_command = b'\x04'
-        self.send_command(hex_command)
-        res = self.read_response(2)
-        try:
-            byte1, byte2 = res[0], res[1]
-            return (byte1 * 256 + byte2) / 1000.0
-        except (TypeError, IndexError) as e:
-            logging.error(f"Failed to parse emissivity: {e}")
-            return None
+        return self._read_register("emissivity")
     
 
     @emissivity.setter
@@ -174,16 +380,18 @@ class OptrisCSLaserControl:
         """
         hex_value = hex(int(new_emissivity * 1000))[2:].zfill(4)
         hex_command = bytes.fromhex('84' + hex_value)
-        self.send_command(hex_command)
-        res = self.read_response(2)
+        self.invalidate("emissivity")
+        res = self.transact(hex_command, 2)
         try:
             byte1, byte2 = res[0], res[1]
             if (byte1 * 256 + byte2) != int(new_emissivity * 1000):
                 logging.error("Failed to set emissivity correctly.")
                 return
         except (TypeError, IndexError) as e:
+            self.stats.parse_failure("0x84")
             logging.error(f"Failed to parse response after setting emissivity: {e}")
             return
+        self._store("emissivity", decode_emissivity(res))
         logging.info(f"Set emissivity to {new_emissivity}.")
     
 
@@ -193,32 +401,33 @@ class OptrisCSLaserControl:
         HEX command: 0x10
         Answer format: 1 byte (0x00 = off, 0x01 = on)
         """
-        hex_command = b'\x10'
-        self.send_command(hex_command)
-        res = self.read_response(1)
-        try:
-            return res[0] == 1
-        except (TypeError, IndexError) as e:
-            logging.error(f"Failed to parse laser state: {e}")
-            return None
+        return self._read_register("laser")
     
 
     @laser.setter
     def laser(self, state: bool) -> None:
+        self.set_laser(state)
+
+
+    def set_laser(self, state: bool) -> bool:
         """
         HEX command: 0x90
         Example: send 90 01 -> Receive 01 (turn on)
         01 = on, 00 = off
+        -> True if the device echoed the requested state
         """
         hex_value = '01' if state else '00'
         hex_command = bytes.fromhex('90' + hex_value)
-        self.send_command(hex_command)
-        res = self.read_response(1)
+        self.invalidate("laser")
+        res = self.transact(hex_command, 1)
         try:
             if res[0] != (1 if state else 0):
                 logging.error("Failed to set laser state correctly.")
-                return
+                return False
         except (TypeError, IndexError) as e:
+            self.stats.parse_failure("0x90")
             logging.error(f"Failed to parse response after setting laser state: {e}")
-            return
-        logging.info(f"Set laser state to {'on' if state else 'off'}.")
\ No newline at end of file
+            return False
+        self._store("laser", decode_laser(res))
+        logging.info(f"Set laser state to {'on' if state else 'off'}.")
+        return True
\ No newline at end of file
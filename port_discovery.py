@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+import serial
+import serial.tools.list_ports
+from optris_cslaser_control import BAUDRATE, DATA_BITS, PARITY, STOP_BITS, REGISTERS
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROBE_TIMEOUT = 0.2 # sec
+CACHE_PATH = Path.home() / ".optris_cslaser_ports.json"
+
+
+def probe_port(port: str, baudrate: int = BAUDRATE, timeout: float = PROBE_TIMEOUT) -> Optional[int]:
+    """
+    Send the serial number query (0x0E) to port -> serial number, or None if no CS Laser answers
+    """
+    command, answer_length, decoder = REGISTERS["serial_number"]
+    try:
+        with serial.Serial(port=port, baudrate=baudrate, timeout=timeout, write_timeout=timeout, bytesize=DATA_BITS,
+                           parity=PARITY, stopbits=STOP_BITS, xonxoff=False) as ser:
+            ser.reset_input_buffer()
+            ser.write(bytes([command]))
+            res = ser.read(answer_length)
+    except (serial.SerialException, OSError) as e:
+        logging.debug(f"Probe of {port} failed: {e}")
+        return None
+    if len(res) != answer_length:
+        return None
+    return decoder(res)
+
+
+def load_cache(cache_path: Path = CACHE_PATH) -> dict:
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(found: dict, cache_path: Path = CACHE_PATH) -> None:
+    try:
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(found, f, indent=2)
+    except OSError as e:
+        logging.warning(f"Failed to save port cache {cache_path}: {e}")
+
+
+def discover(ports=None, timeout: float = PROBE_TIMEOUT, cache_path: Optional[Path] = CACHE_PATH) -> dict:
+    """
+    Probe all ports (default: every serial port of the machine) concurrently
+    -> {port: serial number} of the ports where a CS Laser answered.
+    The result is remembered in cache_path (None: not cached).
+    """
+    if ports is None:
+        ports = [port.device for port in serial.tools.list_ports.comports()]
+    ports = list(ports)
+    if not ports:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(ports), thread_name_prefix="probe") as executor:
+        serial_numbers = list(executor.map(lambda port: probe_port(port, timeout=timeout), ports))
+    found = {port: serial_number for port, serial_number in zip(ports, serial_numbers) if serial_number is not None}
+    if cache_path is not None:
+        save_cache(found, cache_path)
+    logging.info(f"Found {len(found)} CS Laser head(s): {found}")
+    return found
+
+
+def find_port(serial_number: int, timeout: float = PROBE_TIMEOUT, cache_path: Path = CACHE_PATH) -> Optional[str]:
+    """
+    Port of the head with serial_number: the remembered port is checked first,
+    all ports are probed only when the head has moved.
+    """
+    for port, cached_serial_number in load_cache(cache_path).items():
+        if cached_serial_number == serial_number and probe_port(port, timeout=timeout) == serial_number:
+            return port
+    for port, found_serial_number in discover(timeout=timeout, cache_path=cache_path).items():
+        if found_serial_number == serial_number:
+            return port
+    return None
@@ -0,0 +1,165 @@
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import math
+import threading
+
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, math.inf) # sec, upper bounds
+METRICS_PORT = 9105
+
+
+@dataclass
+class CommandStats:
+    count: int = 0
+    timeouts: int = 0 # no answer at all
+    short_reads: int = 0 # answer shorter than expected
+    parse_failures: int = 0
+    resyncs: int = 0 # input drained after a short or misaligned answer
+    bytes_out: int = 0
+    bytes_in: int = 0
+    latency_sum: float = 0.0 # sec, round trip write -> last answer byte
+    latency_max: float = 0.0
+    buckets: list = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS)) # non-cumulative counts
+
+
+    @property
+    def latency_mean(self) -> float:
+        return self.latency_sum / self.count if self.count else 0.0
+
+
+    def latency_percentile(self, q: float) -> float:
+        """
+        Upper bound of the histogram bucket holding the q-quantile (0 < q <= 1)
+        """
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if count and seen >= target:
+                return bound
+        return 0.0
+
+
+class ProtocolStats:
+    """
+    Counters and latency histograms per command of one serial link (thread safe)
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._commands = {}
+
+
+    def record(self, command: str, bytes_out: int, bytes_in: int, expected: int, latency: float) -> None:
+        with self._lock:
+            stats = self._commands.setdefault(command, CommandStats())
+            stats.count += 1
+            stats.bytes_out += bytes_out
+            stats.bytes_in += bytes_in
+            if bytes_in == 0 and expected > 0:
+                stats.timeouts += 1
+            elif bytes_in < expected:
+                stats.short_reads += 1
+            stats.latency_sum += latency
+            stats.latency_max = max(stats.latency_max, latency)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    stats.buckets[i] += 1
+                    break
+
+
+    def resync(self, command: str) -> None:
+        with self._lock:
+            self._commands.setdefault(command, CommandStats()).resyncs += 1
+
+
+    def parse_failure(self, command: str) -> None:
+        with self._lock:
+            self._commands.setdefault(command, CommandStats()).parse_failures += 1
+
+
+    def snapshot(self) -> dict:
+        """
+        Copy of the counters -> {command: CommandStats}
+        """
+        with self._lock:
+            return {
+                command: CommandStats(**{**stats.__dict__, "buckets": list(stats.buckets)})
+                for command, stats in self._commands.items()
+            }
+
+
+    def reset(self) -> None:
+        with self._lock:
+            self._commands.clear()
+
+
+    def format_text(self) -> str:
+        lines = []
+        for command, stats in sorted(self.snapshot().items()):
+            lines.append(
+                f"{command:>10}: n={stats.count} timeouts={stats.timeouts} short={stats.short_reads} "
+                f"parse_fail={stats.parse_failures} resync={stats.resyncs} out={stats.bytes_out}B in={stats.bytes_in}B "
+                f"rtt mean={stats.latency_mean * 1000:.1f}ms p99<={stats.latency_percentile(0.99) * 1000:.0f}ms "
+                f"max={stats.latency_max * 1000:.1f}ms")
+        return "\n".join(lines)
+
+
+def format_metrics(stats_by_port: dict) -> str:
+    """
+    Prometheus text exposition of {port: ProtocolStats}
+    """
+    lines = [
+        "# TYPE cslaser_commands_total counter",
+        "# TYPE cslaser_timeouts_total counter",
+        "# TYPE cslaser_short_reads_total counter",
+        "# TYPE cslaser_parse_failures_total counter",
+        "# TYPE cslaser_resyncs_total counter",
+        "# TYPE cslaser_bytes_out_total counter",
+        "# TYPE cslaser_bytes_in_total counter",
+        "# TYPE cslaser_rtt_seconds histogram",
+    ]
+    for port, protocol_stats in stats_by_port.items():
+        for command, stats in sorted(protocol_stats.snapshot().items()):
+            labels = f'port="{port}",command="{command}"'
+            lines.append(f"cslaser_commands_total{{{labels}}} {stats.count}")
+            lines.append(f"cslaser_timeouts_total{{{labels}}} {stats.timeouts}")
+            lines.append(f"cslaser_short_reads_total{{{labels}}} {stats.short_reads}")
+            lines.append(f"cslaser_parse_failures_total{{{labels}}} {stats.parse_failures}")
+            lines.append(f"cslaser_resyncs_total{{{labels}}} {stats.resyncs}")
+            lines.append(f"cslaser_bytes_out_total{{{labels}}} {stats.bytes_out}")
+            lines.append(f"cslaser_bytes_in_total{{{labels}}} {stats.bytes_in}")
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else f"{bound}"
+                lines.append(f'cslaser_rtt_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"cslaser_rtt_seconds_sum{{{labels}}} {stats.latency_sum}")
+            lines.append(f"cslaser_rtt_seconds_count{{{labels}}} {stats.count}")
+    return "\n".join(lines) + "\n"
+
+
+def serve_metrics(stats_by_port: dict, port: int = METRICS_PORT, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve format_metrics() on http://host:port/metrics from a daemon thread
+    Call shutdown() on the returned server to stop it.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = format_metrics(stats_by_port).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="MetricsServer", daemon=True).start()
+    logging.info(f"Serving protocol metrics on http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,180 @@
+"""
+Replay of recorded runs (.csv written by DataLogger incl. rotated / compressed segments, or .obr)
+
+Samples are emitted with their recorded timing divided by speed (0: as fast as possible),
+as CSLaserSnapshot with the recorded time_ns, so the polling thread consumers
+(sample buffer, chart, logger, statistics) see exactly the recorded session.
+
+Example)
+    python replay.py run.csv --speed 10 --output replayed.obr --format obr
+"""
+import argparse
+from dataclasses import dataclass
+import logging
+import math
+from pathlib import Path
+import time
+from optris_cslaser_control import CSLaserSnapshot, SNAPSHOT_FIELDS
+from binary_logger import BinaryLogReader, BinaryLogger, TIMESTAMP_COLUMN
+from data_logger import DataLogger, to_ns
+from data_collector import format_timestamp
+from log_reader import SegmentedLogReader
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+COLUMN_ALIASES = {"temperature": "target_temperature"} # columns of DataCollector recordings
+MAX_SLEEP_STEP = 0.1 # sec, upper bound of a single sleep so stop() is served quickly
+
+
+@dataclass
+class ReplayStats:
+    samples: int = 0
+    elapsed: float = 0.0 # sec, wall clock
+    max_lag: float = 0.0 # sec, worst emission behind the scaled recorded time
+
+
+    @property
+    def rate(self) -> float:
+        return self.samples / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def _parse(value):
+    if value is None or value == "":
+        return None
+    if value in ("True", "False"):
+        return value == "True"
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def read_recording(path):
+    """
+    Yield (time_ns, {column: value}) of every row; values are float / bool / None
+    """
+    path = Path(path)
+    if path.suffix == ".obr":
+        reader = BinaryLogReader(path)
+        columns = reader.columns
+        for row in reader.data:
+            values = {}
+            for column in columns:
+                value = float(row[column])
+                values[COLUMN_ALIASES.get(column, column)] = None if math.isnan(value) else value
+            yield int(row[TIMESTAMP_COLUMN]), values
+        return
+    for row in SegmentedLogReader(path):
+        time_ns = int(row[TIMESTAMP_COLUMN]) if row.get(TIMESTAMP_COLUMN) else to_ns(row["timestamp"])
+        values = {COLUMN_ALIASES.get(column, column): _parse(value)
+                  for column, value in row.items() if column not in ("timestamp", TIMESTAMP_COLUMN)}
+        yield time_ns, values
+
+
+class ReplaySource:
+    """
+    Iterates a recording as CSLaserSnapshots paced by the recorded timing / speed
+    stats tells the achieved rate and how far emission fell behind the schedule.
+    """
+    def __init__(self, path, speed: float = 1.0, fields=SNAPSHOT_FIELDS, loop: bool = False):
+        self.path = Path(path)
+        self.port = f"replay:{self.path.name}"
+        self.speed = speed
+        self.fields = tuple(fields)
+        self.loop = loop
+        self.stats = ReplayStats()
+        self._running = False
+
+
+    def snapshots(self):
+        """
+        Recorded snapshots without pacing
+        """
+        for time_ns, values in read_recording(self.path):
+            snapshot = CSLaserSnapshot(time_ns=time_ns)
+            for field in self.fields:
+                setattr(snapshot, field, values.get(field))
+            if values.get("monotonic_ns") is not None:
+                snapshot.monotonic_ns = int(values["monotonic_ns"])
+            snapshot.latency = values.get("latency")
+            yield snapshot
+
+
+    def _sleep_until(self, due: float) -> None:
+        while self._running:
+            remaining = due - time.perf_counter()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, MAX_SLEEP_STEP))
+
+
+    def __iter__(self):
+        self._running = True
+        self.stats = ReplayStats()
+        start = time.perf_counter()
+        offset_ns = 0 # shifts the later passes of a loop behind the first
+        first_ns = None
+        while self._running:
+            count = 0
+            for snapshot in self.snapshots():
+                if not self._running:
+                    break
+                if first_ns is None:
+                    first_ns = snapshot.time_ns
+                if count == 0:
+                    pass_start_ns = snapshot.time_ns
+                pass_end_ns = snapshot.time_ns
+                count += 1
+                snapshot.time_ns += offset_ns # keep timestamps increasing across passes
+                if self.speed > 0:
+                    due = start + (snapshot.time_ns - first_ns) / 1e9 / self.speed
+                    self._sleep_until(due)
+                    self.stats.max_lag = max(self.stats.max_lag, time.perf_counter() - due)
+                self.stats.samples += 1
+                self.stats.elapsed = time.perf_counter() - start
+                yield snapshot
+            if not self.loop or count == 0:
+                break
+            duration_ns = pass_end_ns - pass_start_ns
+            offset_ns += duration_ns + duration_ns // max(count - 1, 1)
+        self._running = False
+
+
+    def stop(self) -> None:
+        self._running = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded run into a logger")
+    parser.add_argument("recording", type=Path, help=".csv (DataLogger) or .obr (BinaryLogger)")
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale, 0: as fast as possible")
+    parser.add_argument("--output", type=Path, required=True)
+    parser.add_argument("--format", choices=("csv", "obr"), default="csv")
+    args = parser.parse_args()
+
+    source = ReplaySource(args.recording, args.speed)
+    if args.format == "obr":
+        logger = BinaryLogger(args.output, ["target_temperature", "head_temperature", "latency"],
+                              metadata={"replay_of": str(args.recording)})
+    else:
+        logger = DataLogger(args.output)
+    start = time.perf_counter()
+    try:
+        for snapshot in source:
+            data_dict = {
+                "timestamp": format_timestamp(snapshot.time_ns), "timestamp_ns": snapshot.time_ns, "latency": snapshot.latency,
+            }
+            data_dict.update({field: getattr(snapshot, field) for field in source.fields})
+            logger.write(data_dict)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logger.close()
+    stats = source.stats
+    logging.info(
+        f"Replayed {stats.samples} samples at {stats.rate:.0f} samples/sec, max lag {stats.max_lag * 1000:.1f} ms, "
+        f"{time.perf_counter() - start:.2f} sec incl. closing the logger")
+
+
+if __name__ == "__main__":
+    main()
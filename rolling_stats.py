@@ -0,0 +1,201 @@
+from collections import deque
+from dataclasses import dataclass
+import math
+import threading
+from typing import Optional
+
+DEFAULT_WINDOWS = ("60s",)
+DEFAULT_EWMA = (10.0,) # sec, time constants
+STATS = ("mean", "std", "min", "max", "slope")
+
+
+@dataclass(frozen=True)
+class WindowSpec:
+    size: float # samples (count window) or sec (time window)
+    timed: bool = True
+
+
+    @property
+    def name(self) -> str:
+        return f"{self.size:g}s" if self.timed else f"{int(self.size)}n"
+
+
+def parse_window(text: str) -> WindowSpec:
+    """
+    "60s" -> last 60 sec, "100" / "100n" -> last 100 samples
+    """
+    if text.endswith("s"):
+        return WindowSpec(float(text[:-1]), timed=True)
+    return WindowSpec(int(text.rstrip("n")), timed=False)
+
+
+class RollingWindow:
+    """
+    mean, std, min, max and least-squares slope over a sliding window in O(1) per sample
+    Running sums are kept relative to a reference sample and rebased once per window
+    length (amortized O(1)), so they do not lose precision over long runs.
+    min / max come from monotonic deques.
+    """
+    def __init__(self, spec: WindowSpec):
+        self.spec = spec
+        self._samples = deque() # (t, value)
+        self._min = deque() # (sample number, value), increasing values
+        self._max = deque() # (sample number, value), decreasing values
+        self._added = 0 # samples ever added
+        self._evicted = 0 # samples ever evicted
+        self._rebase(0.0, 0.0)
+
+
+    def _rebase(self, t0: float, v0: float) -> None:
+        self._t0, self._v0 = t0, v0
+        self._st = self._sv = self._stt = self._svv = self._stv = 0.0
+        for t, value in self._samples:
+            self._add_sums(t, value, 1.0)
+        self._updates = 0
+
+
+    def _add_sums(self, t: float, value: float, sign: float) -> None:
+        dt, dv = t - self._t0, value - self._v0
+        self._st += sign * dt
+        self._sv += sign * dv
+        self._stt += sign * dt * dt
+        self._svv += sign * dv * dv
+        self._stv += sign * dt * dv
+
+
+    def update(self, t: float, value: float) -> None:
+        if not self._samples:
+            self._rebase(t, value)
+        self._samples.append((t, value))
+        self._add_sums(t, value, 1.0)
+        while self._min and self._min[-1][1] > value:
+            self._min.pop()
+        self._min.append((self._added, value))
+        while self._max and self._max[-1][1] < value:
+            self._max.pop()
+        self._max.append((self._added, value))
+        self._added += 1
+        if self.spec.timed:
+            while t - self._samples[0][0] > self.spec.size:
+                self._evict()
+        else:
+            while len(self._samples) > self.spec.size:
+                self._evict()
+        self._updates += 1
+        if self._updates >= len(self._samples):
+            self._rebase(*self._samples[0])
+
+
+    def _evict(self) -> None:
+        t, value = self._samples.popleft()
+        self._add_sums(t, value, -1.0)
+        if self._min[0][0] == self._evicted:
+            self._min.popleft()
+        if self._max[0][0] == self._evicted:
+            self._max.popleft()
+        self._evicted += 1
+
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+    def result(self) -> dict:
+        n = len(self._samples)
+        if n == 0:
+            return {stat: None for stat in STATS}
+        mean = self._sv / n
+        var = max(self._svv / n - mean * mean, 0.0)
+        sxx = self._stt - self._st * self._st / n
+        sxy = self._stv - self._st * self._sv / n
+        return {
+            "mean": self._v0 + mean,
+            "std": math.sqrt(var * n / (n - 1)) if n > 1 else 0.0,
+            "min": self._min[0][1],
+            "max": self._max[0][1],
+            "slope": sxy / sxx if n > 1 and sxx > 0 else None, # °C/sec
+        }
+
+
+class Ewma:
+    """
+    Exponentially weighted moving average with time constant tau (sec),
+    weighted by the actual sample spacing so irregular polling is handled.
+    """
+    def __init__(self, tau: float):
+        self.tau = tau
+        self.value = None
+        self._last_time = None
+
+
+    @property
+    def name(self) -> str:
+        return f"ewma{self.tau:g}s"
+
+
+    def update(self, t: float, value: float) -> float:
+        if self.value is None:
+            self.value = value
+        else:
+            alpha = 1.0 - math.exp(-max(t - self._last_time, 0.0) / self.tau)
+            self.value += alpha * (value - self.value)
+        self._last_time = t
+        return self.value
+
+
+class RollingStats:
+    """
+    Streaming statistics of one field over several windows plus EWMAs
+    update() is called by the acquisition thread for every sample; latest holds
+    the newest results as {column: value} with columns like
+    target_temperature_60s_mean, target_temperature_100n_slope, target_temperature_ewma10s.
+    """
+    def __init__(self, field: str = "target_temperature", windows=DEFAULT_WINDOWS, ewma=DEFAULT_EWMA):
+        self.field = field
+        specs = [window if isinstance(window, WindowSpec) else parse_window(str(window)) for window in windows]
+        self.windows = {spec.name: RollingWindow(spec) for spec in specs}
+        self.ewmas = [Ewma(tau) for tau in ewma]
+        self._lock = threading.Lock()
+        self._latest = {column: None for column in self.columns}
+
+
+    @property
+    def columns(self) -> list:
+        columns = [f"{self.field}_{name}_{stat}" for name in self.windows for stat in STATS]
+        return columns + [f"{self.field}_{ewma.name}" for ewma in self.ewmas]
+
+
+    @property
+    def latest(self) -> dict:
+        with self._lock:
+            return dict(self._latest)
+
+
+    def update(self, t: float, value: Optional[float]) -> dict:
+        """
+        t: sec, value: None or NaN is skipped (results unchanged)
+        -> {column: value}
+        """
+        if value is None or math.isnan(value):
+            return self.latest
+        results = {}
+        for name, window in self.windows.items():
+            window.update(t, value)
+            for stat, result in window.result().items():
+                results[f"{self.field}_{name}_{stat}"] = result
+        for ewma in self.ewmas:
+            results[f"{self.field}_{ewma.name}"] = ewma.update(t, value)
+        with self._lock:
+            self._latest = results
+        return dict(results)
+
+
+    def is_stable(self, window: str, max_std: float, max_slope: float, min_samples: int = 2) -> bool:
+        """
+        Stability criterion on one window: std <= max_std (°C) and |slope| <= max_slope (°C/sec)
+        """
+        rolling = self.windows[window]
+        if len(rolling) < min_samples:
+            return False
+        result = rolling.result()
+        return result["std"] <= max_std and result["slope"] is not None and abs(result["slope"]) <= max_slope
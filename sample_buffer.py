@@ -0,0 +1,144 @@
+import threading
+from typing import Optional
+import numpy as np
+from optris_cslaser_control import SNAPSHOT_FIELDS
+
+DEFAULT_CAPACITY = 1 << 20 # samples, ~ 6 days at 2 Hz
+TIMING_DTYPE = [
+    ("timestamp", "f8"), # unix sec
+    ("time_ns", "i8"), # unix ns when the answer arrived (0: unknown)
+    ("monotonic_ns", "i8"), # time.perf_counter_ns() when the answer arrived (0: unknown)
+    ("latency", "f8"), # sec, request -> answer
+]
+
+
+class SampleRingBuffer:
+    """
+    Fixed-capacity, preallocated sample store shared between the polling thread (writer)
+    and the GUI / logger / statistics (readers).
+    Each row is (timestamp, time_ns, monotonic_ns, latency, *fields) as a NumPy structured
+    array (see TIMING_DTYPE); missing values are NaN (0 for the integer clocks).
+    Samples are addressed by an absolute index (0, 1, 2, ... since creation),
+    readers keep the last index they consumed and fetch everything newer in one call.
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, fields=SNAPSHOT_FIELDS):
+        self.fields = tuple(fields)
+        # f8: float32 would turn a 91.3 °C answer into 91.30000305175781 in the rows built from it
+        self.dtype = np.dtype(TIMING_DTYPE + [(field, "f8") for field in self.fields])
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=self.dtype)
+        for name in self.dtype.names:
+            self._data[name] = self._missing(name)
+        self._written = 0 # absolute index of the next sample
+        self._lock = threading.Lock()
+
+
+    def __len__(self) -> int:
+        return min(self._written, self.capacity)
+
+
+    @property
+    def total_written(self) -> int:
+        return self._written
+
+
+    def _missing(self, name: str):
+        return 0 if self.dtype[name].kind == "i" else np.nan
+
+
+    def append(self, timestamp: float, values: dict, time_ns: Optional[int] = None,
+               monotonic_ns: Optional[int] = None, latency: Optional[float] = None) -> None:
+        with self._lock:
+            row = self._data[self._written % self.capacity]
+            row["timestamp"] = timestamp
+            row["time_ns"] = time_ns if time_ns is not None else round(timestamp * 1e9)
+            row["monotonic_ns"] = monotonic_ns or 0
+            row["latency"] = np.nan if latency is None else latency
+            for field in self.fields:
+                value = values.get(field)
+                row[field] = np.nan if value is None else value
+            self._written += 1
+
+
+    def append_snapshot(self, timestamp: float, snapshot) -> None:
+        """
+        timestamp is used only if the snapshot carries no time_ns of its own
+        """
+        time_ns = getattr(snapshot, "time_ns", None)
+        self.append(
+            time_ns / 1e9 if time_ns is not None else timestamp,
+            {field: getattr(snapshot, field, None) for field in self.fields},
+            time_ns=time_ns, monotonic_ns=getattr(snapshot, "monotonic_ns", None),
+            latency=getattr(snapshot, "latency", None))
+
+
+    def append_block(self, block: np.ndarray) -> None:
+        """
+        Append a structured array with (a subset of) this buffer's fields at once
+        """
+        with self._lock:
+            # rows which do not fit are overwritten at once, but still count as written
+            skipped = max(len(block) - self.capacity, 0)
+            self._written += skipped
+            block = block[skipped:]
+            start = self._written % self.capacity
+            first = min(len(block), self.capacity - start)
+            for name in block.dtype.names:
+                self._data[name][start:start + first] = block[name][:first]
+                self._data[name][:len(block) - first] = block[name][first:]
+            missing = [name for name in self.dtype.names if name not in block.dtype.names]
+            for name in missing:
+                self._data[name][start:start + first] = self._missing(name)
+                self._data[name][:len(block) - first] = self._missing(name)
+            self._written += len(block)
+
+
+    def _segments(self, start: int, stop: int) -> list:
+        # views of absolute indices [start, stop) in order, caller holds the lock
+        if stop <= start:
+            return []
+        i, j = start % self.capacity, stop % self.capacity
+        if i < j:
+            return [self._data[i:j]]
+        return [self._data[i:], self._data[:j]]
+
+
+    def _ordered(self, start: int, stop: int) -> np.ndarray:
+        segments = self._segments(start, stop)
+        if not segments:
+            return np.empty(0, dtype=self.dtype)
+        return np.concatenate(segments)
+
+
+    def latest(self, n: int = 1) -> np.ndarray:
+        with self._lock:
+            stop = self._written
+            return self._ordered(max(stop - min(n, self.capacity), 0), stop)
+
+
+    def since(self, index: int):
+        """
+        Samples written since absolute index -> (samples, next index)
+        Samples already overwritten are silently skipped (reader fell behind a full buffer).
+        """
+        with self._lock:
+            stop = self._written
+            start = max(index, stop - self.capacity, 0)
+            return self._ordered(start, stop), stop
+
+
+    def window(self, t_start: float, t_end: float) -> np.ndarray:
+        """
+        Samples with t_start <= timestamp <= t_end
+        """
+        with self._lock:
+            stop = self._written
+            selected = []
+            for segment in self._segments(max(stop - self.capacity, 0), stop):
+                timestamps = segment["timestamp"]
+                i = np.searchsorted(timestamps, t_start, side="left")
+                j = np.searchsorted(timestamps, t_end, side="right")
+                selected.append(segment[i:j])
+            if not selected:
+                return np.empty(0, dtype=self.dtype)
+            return np.concatenate(selected)
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+import numpy as np
+from burst_reader import BurstFormat, BurstReader, decode_frames, find_frames
+from sample_buffer import SampleRingBuffer
+
+
+def frames(fmt, values):
+    return np.frombuffer(b"".join(fmt.encode(raw) for raw in values), dtype=np.uint8)
+
+
+def test_find_frames_with_sync_byte_in_payload():
+    fmt = BurstFormat()
+    # 00 AA | AA 00: the values contain the sync AA AA half a frame after each start
+    values = [(0x00AA, 0xAA00)] * 10
+    data = frames(fmt, values)
+    starts = find_frames(data, fmt)
+    assert starts.tolist() == list(range(0, 9 * fmt.frame_size, fmt.frame_size))
+    temperatures, valid = decode_frames(data, starts, fmt)
+    assert valid.all()
+    np.testing.assert_allclose(temperatures["target_temperature"], (0x00AA - 1000) / 10)
+    np.testing.assert_allclose(temperatures["head_temperature"], (0xAA00 - 1000) / 10)
+
+
+def test_find_frames_with_chained_false_start():
+    fmt = BurstFormat()
+    # two frames with AA AA at the same offset: the first false start chains to the second
+    values = [(1300, 350)] * 4 + [(0x12AA, 0xAA34)] * 2 + [(1300, 350)] * 3
+    data = frames(fmt, values)
+    starts = find_frames(data, fmt)
+    assert starts.tolist() == list(range(0, 8 * fmt.frame_size, fmt.frame_size))
+
+
+def test_find_frames_with_checksum():
+    fmt = BurstFormat(checksum=True)
+    data = frames(fmt, [(0x00AA, 0xAA00)] * 5)
+    starts = find_frames(data, fmt)
+    assert starts.tolist() == list(range(0, 4 * fmt.frame_size, fmt.frame_size))
+    assert decode_frames(data, starts, fmt)[1].all()
+
+
+def test_feed_joining_mid_frame():
+    fmt = BurstFormat()
+    # 300.0 °C target, 45.0 °C head (raw 05 AA): 05 AA | AA AA is a run of three sync bytes
+    stream = frames(fmt, [(4000, 1450)] * 10).tobytes()
+    reader = BurstReader(SimpleNamespace(baudrate=115200), SampleRingBuffer(100, fields=fmt.fields), fmt)
+    block = reader.feed(stream[5:], 0)
+    assert len(block) == 8
+    np.testing.assert_allclose(block["target_temperature"], 300.0)
+    np.testing.assert_allclose(block["head_temperature"], 45.0)
+    assert reader.stats["skipped_bytes"] == 1
+
+
+def test_feed_joining_mid_frame_with_checksum():
+    fmt = BurstFormat(checksum=True)
+    # 300.0 °C target, 28.0 °C head: checksum 0F ^ A0 ^ 05 ^ 00 = AA runs into the next sync
+    stream = frames(fmt, [(4000, 1280)] * 10).tobytes()
+    reader = BurstReader(SimpleNamespace(baudrate=115200), SampleRingBuffer(100, fields=fmt.fields), fmt)
+    block = reader.feed(stream[6:], 0)
+    assert len(block) == 8
+    np.testing.assert_allclose(block["target_temperature"], 300.0)
+    np.testing.assert_allclose(block["head_temperature"], 28.0)
+    assert reader.stats["checksum_errors"] == 0
@@ -0,0 +1,80 @@
+from cslaser_emulator import CSLaserDeviceModel, EmulatorConfig, FakeSerial, constant
+from interlock import Interlock, LimitRule, RateRule, NOTIFY, laser_off_bound
+from optris_cslaser_control import CSLaserSnapshot, OptrisCSLaserControl
+
+
+class DeafSerial(FakeSerial):
+    """
+    Swallows the echo of 0x90 while deaf (laser-off not acknowledged)
+    """
+    deaf = True
+
+    def write(self, data: bytes) -> int:
+        answer = self.model.feed(data)
+        if not (self.deaf and data[:1] == b"\x90"):
+            self._input += answer
+        return len(data)
+
+
+def connect(serial_type=FakeSerial, **kwargs):
+    model = CSLaserDeviceModel(EmulatorConfig(byte_timing=False, laser=True))
+    controller = OptrisCSLaserControl("fake", baudrate=115200, **kwargs)
+    controller.serial = serial_type(model)
+    return controller, model
+
+
+def sample(value: float, t: float) -> CSLaserSnapshot:
+    return CSLaserSnapshot(target_temperature=value, time_ns=int(t * 1e9), monotonic_ns=int(t * 1e9))
+
+
+def test_limit_hysteresis_switches_the_laser_off_once():
+    controller, model = connect()
+    interlock = Interlock([LimitRule("max", high=400.0, hysteresis=5.0)])
+    trips = []
+    for value in (390.0, 401.0, 420.0, 397.0, 394.0, 401.0):
+        model.config.target_temperature = constant(value)
+        model.laser = True
+        trips.append(len(interlock.check(controller.read_snapshot(), controller)))
+    # 397 is inside the hysteresis band, 394 re-arms the rule
+    assert trips == [0, 1, 0, 0, 0, 1]
+    assert not model.laser
+    assert all(event.action_ok for event in interlock.events)
+    assert interlock.max_trip_latency <= laser_off_bound(controller) + 0.1
+
+
+def test_rate_hysteresis():
+    interlock = Interlock([RateRule("rise", max_rate=10.0, window=1.0, hysteresis=2.0, action=NOTIFY)])
+    trips = []
+    # 5, 20, 9 (within the band), 5, 20 °C/sec
+    for t, value in ((0.0, 300.0), (1.0, 305.0), (2.0, 325.0), (3.0, 334.0), (4.0, 339.0), (5.0, 359.0)):
+        trips.append(len(interlock.check(sample(value, t))))
+    assert trips == [0, 0, 1, 0, 0, 1]
+    assert interlock.events[0].value == 20.0
+    assert interlock.events[0].action_ok is None
+
+
+def test_unacknowledged_laser_off_is_retried():
+    controller, model = connect(DeafSerial)
+    interlock = Interlock([LimitRule("max", high=400.0)])
+    events = interlock.check(sample(450.0, 0.0), controller)
+    assert events[0].action_ok is False
+    assert interlock.inhibits_laser
+    # the device switched the laser off but never answered: keep sending 90 00
+    model.laser = True
+    controller.serial.deaf = False
+    assert interlock.check(sample(450.0, 0.1), controller) == []
+    assert not model.laser
+    model.laser = True
+    interlock.check(sample(450.0, 0.2), controller)
+    assert model.laser # acknowledged, not sent again
+
+
+def test_laser_off_without_cache():
+    controller, model = connect(cache_ttl={})
+    interlock = Interlock([LimitRule("max", high=400.0)])
+    events = interlock.check(sample(450.0, 0.0), controller)
+    assert events[0].action_ok is True
+    assert not model.laser
+    model.laser = True
+    interlock.check(sample(450.0, 0.1), controller)
+    assert model.laser # no pending retry
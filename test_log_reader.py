@@ -0,0 +1,27 @@
+from data_logger import DataLogger, INDEX_STRIDE
+from log_reader import CSVLogReader, SegmentedLogReader
+
+
+def write_rows(csv_path, stamps, rows_per_stamp):
+    with DataLogger(csv_path) as logger:
+        for second in stamps:
+            for i in range(rows_per_stamp):
+                logger.write({"timestamp": f"2026-01-01 00:00:{second:02d}.000000", "value": i})
+
+
+def test_read_range_with_duplicate_timestamps(tmp_path):
+    csv_path = tmp_path / "run.csv"
+    rows_per_stamp = INDEX_STRIDE + 44 # index entries fall inside each run of equal stamps
+    write_rows(csv_path, (0, 1), rows_per_stamp)
+    t = "2026-01-01 00:00:01"
+    assert len(list(CSVLogReader(csv_path).read_range(t, t))) == rows_per_stamp
+    assert len(list(SegmentedLogReader(csv_path).read_range(t, t))) == rows_per_stamp
+
+
+def test_read_range_after_rebuilt_index(tmp_path):
+    csv_path = tmp_path / "run.csv"
+    write_rows(csv_path, (0, 1, 2), 300)
+    (tmp_path / "run.csv.idx").unlink()
+    rows = list(CSVLogReader(csv_path).read_range("2026-01-01 00:00:01", "2026-01-01 00:00:02"))
+    assert len(rows) == 600
+    assert rows[0]["value"] == "0"
@@ -0,0 +1,49 @@
+import os
+import time
+import pytest
+from cslaser_emulator import CSLaserDeviceModel, CSLaserEmulator, EmulatorConfig, FakeSerial
+from optris_cslaser_control import OptrisCSLaserControl, answer_deadline
+
+BAUDRATE = 115200
+
+
+class ChatteringSerial(FakeSerial):
+    """
+    A line which never goes quiet (noise, a head left in burst mode)
+    """
+    @property
+    def in_waiting(self) -> int:
+        self._input += b"\xAA"
+        return len(self._input)
+
+
+def test_drain_is_capped_on_a_chattering_line():
+    controller = OptrisCSLaserControl("fake", baudrate=BAUDRATE)
+    controller.serial = ChatteringSerial(CSLaserDeviceModel(EmulatorConfig(byte_timing=False)))
+    start = time.perf_counter()
+    controller.transact(b"\x01", 2)
+    elapsed = time.perf_counter() - start
+    assert controller.stats.snapshot()["0x01"].resyncs == controller.retries + 1
+    assert elapsed <= controller.transact_bound(1, 2)
+
+
+@pytest.mark.skipif(not hasattr(os, "openpty"), reason="pty emulator needs a POSIX system")
+def test_resync_after_truncated_answers():
+    config = EmulatorConfig(baudrate=BAUDRATE, truncate_probability=0.3, seed=1)
+    with CSLaserEmulator(config) as emulator:
+        controller = OptrisCSLaserControl(emulator.port, baudrate=BAUDRATE, retries=3)
+        controller.connect(dtr_reset=False)
+        try:
+            durations, answers = [], []
+            for _ in range(100):
+                start = time.perf_counter()
+                answers.append(controller.transact(b"\x01", 2))
+                durations.append(time.perf_counter() - start)
+        finally:
+            controller.disconnect()
+    assert emulator.stats["truncated"] > 10
+    # 0.3 ** 4: a few answers may stay short after all retries, the rest is realigned
+    assert sum(answer is not None and len(answer) == 2 for answer in answers) >= 97
+    # a truncated answer costs about one deadline plus a drain, not the 1 s port timeout
+    assert max(durations) <= controller.transact_bound(1, 2)
+    assert max(durations) < 4 * (2 * answer_deadline(BAUDRATE, 1, 2) + 0.01)